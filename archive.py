@@ -0,0 +1,160 @@
+import os
+import gzip
+import bz2
+import lzma
+import tarfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for .tar.zst
+    zstandard = None
+
+TAR_SUFFIXES = {
+    ".tar.gz": "gz", ".tgz": "gz",
+    ".tar.xz": "xz", ".txz": "xz",
+    ".tar.bz2": "bz2", ".tbz2": "bz2",
+    ".tar.zst": "zst", ".tzst": "zst",
+    ".tar": "tar"
+}
+MAGIC = [
+    (b"PK\x03\x04", "zip"), (b"PK\x05\x06", "zip"),
+    (b"\x1f\x8b", "gz"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"BZh", "bz2"),
+    (b"\x28\xb5\x2f\xfd", "zst")
+]
+PGZ_BLOCK_SIZE = 1024 * 1024
+
+def tar_format(name):
+    lower = name.lower()
+    for suffix, fmt in TAR_SUFFIXES.items():
+        if lower.endswith(suffix):
+            return fmt
+    return None
+
+def detect_format(path):
+    with open(path, 'rb') as f:
+        head = f.read(265)
+    for magic, fmt in MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if head[257:262] == b"ustar":
+        return "tar"
+    return None
+
+class ParallelGzipWriter:
+    """Compresses fixed-size blocks on a thread pool and writes them as
+    concatenated gzip members, which gzip and pigz both decompress as one
+    file. zlib releases the GIL so blocks compress on separate cores. At
+    most 2 blocks per worker are in flight.
+    """
+
+    def __init__(self, fileobj, level=6, block_size=PGZ_BLOCK_SIZE, workers=None):
+        self.fileobj = fileobj
+        self.level = level
+        self.block_size = block_size
+        workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.max_pending = workers * 2
+        self.pending = deque()
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self._submit(bytes(self.buffer[:self.block_size]))
+            del self.buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block):
+        self.pending.append(self.pool.submit(gzip.compress, block, self.level, mtime=0))
+        while len(self.pending) > self.max_pending:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.buffer:
+            self._submit(bytes(self.buffer))
+            self.buffer = bytearray()
+        while self.pending:
+            self.fileobj.write(self.pending.popleft().result())
+        self.pool.shutdown()
+
+def _require_zstandard():
+    if zstandard is None:
+        raise Exception("zstd archives require the 'zstandard' package")
+
+def _compressed_writer(fileobj, fmt, parallel=False):
+    if fmt == "gz":
+        return ParallelGzipWriter(fileobj) if parallel else gzip.GzipFile(fileobj=fileobj, mode='wb')
+    if fmt == "xz":
+        return lzma.LZMAFile(fileobj, 'wb')
+    if fmt == "bz2":
+        return bz2.BZ2File(fileobj, 'wb')
+    if fmt == "zst":
+        _require_zstandard()
+        return zstandard.ZstdCompressor(threads=-1 if parallel else 0).stream_writer(fileobj, closefd=False)
+    return None
+
+def _decompressed_reader(fileobj, fmt):
+    if fmt == "gz":
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')  # handles multi-member (parallel) output
+    if fmt == "xz":
+        return lzma.LZMAFile(fileobj, 'rb')
+    if fmt == "bz2":
+        return bz2.BZ2File(fileobj, 'rb')
+    if fmt == "zst":
+        _require_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=False)
+    return fileobj
+
+def walk_sources(src_path, arc_root):
+    # Yields (path, arcname) for the source and, for directories, everything below it
+    yield src_path, arc_root
+    if os.path.isdir(src_path) and not os.path.islink(src_path):
+        for root, dirs, files in os.walk(src_path):
+            dirs.sort()
+            for name in dirs + sorted(files):
+                path = os.path.join(root, name)
+                yield path, os.path.join(arc_root, os.path.relpath(path, src_path))
+
+def write_tar(sources, out_path, fmt, parallel=False):
+    """Stream (path, arcname) pairs into a tar, compressing on the fly.
+
+    Members are read in tarfile's copy buffer and the archive is written in
+    stream mode, so memory stays bounded regardless of the tree size. It goes
+    to a temporary file that replaces out_path only once complete, so a
+    failure leaves no truncated archive behind.
+    """
+    if fmt == "zst":
+        _require_zstandard()
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as raw:
+            writer = _compressed_writer(raw, fmt, parallel)
+            try:
+                with tarfile.open(fileobj=writer or raw, mode='w|', format=tarfile.PAX_FORMAT) as tf:
+                    for path, arcname in sources:
+                        tf.add(path, arcname, recursive=False)
+            finally:
+                if writer is not None:
+                    writer.close()
+        os.replace(tmp_path, out_path)
+    except BaseException:  # Ctrl-C included
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def iter_tar_extract(archive_path, dest_path, fmt):
+    # Extracts member by member straight from the decompressor; yields each name
+    extract_args = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+    with open(archive_path, 'rb') as raw:
+        reader = _decompressed_reader(raw, fmt)
+        with tarfile.open(fileobj=reader, mode='r|') as tf:
+            for member in tf:
+                tf.extract(member, dest_path, **extract_args)
+                yield member.name
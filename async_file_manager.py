@@ -0,0 +1,131 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from file_manager import FileManager
+
+class AsyncFileManager:
+    """Coroutine facade over FileManager for use inside an asyncio event loop.
+
+    Blocking work runs on a dedicated, bounded thread pool. The facade keeps
+    its own current directory and resolves every relative name against it
+    before handing the call to a worker, so concurrent operations started
+    with asyncio.gather never depend on FileManager.current_dir or the
+    process cwd. Tag updates are serialized by FileManager's lock.
+
+    Every operation takes an optional timeout (seconds, defaulting to
+    default_timeout). A timed-out or cancelled call stops being awaited
+    immediately; the worker thread finishes the filesystem call it is in.
+    """
+
+    def __init__(self, file_manager=None, max_workers=4, max_pending=64, default_timeout=None, directory=None):
+        self.file_manager = file_manager or FileManager()
+        self.current_dir = os.path.abspath(directory or self.file_manager.get_current_dir())
+        self.default_timeout = default_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fyle-async")
+        self._slots = asyncio.Semaphore(max_pending)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _path(self, name):
+        return os.path.join(self.current_dir, name)
+
+    async def _run(self, func, *args, timeout=None, **kwargs):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+            return await asyncio.wait_for(future, timeout if timeout is not None else self.default_timeout)
+
+    def get_current_dir(self):
+        return self.current_dir
+
+    async def change_dir(self, path, timeout=None):
+        new_path = os.path.abspath(self._path(path))
+        if not await self._run(os.path.isdir, new_path, timeout=timeout):
+            raise Exception(f"Directory change failed: {path} is not a directory")
+        self.current_dir = new_path
+        return True
+
+    async def list_files(self, detailed=False, sort_by="name", min_size=0, max_size=None,
+                         limit=None, offset=0, top=None, reverse=False, timeout=None):
+        return await self._run(self.file_manager.list_files, detailed, sort_by, min_size, max_size,
+                               limit=limit, offset=offset, top=top, reverse=reverse,
+                               directory=self.current_dir, timeout=timeout)
+
+    async def copy_file(self, source, destination, timeout=None):
+        return await self._run(self.file_manager.copy_file, self._path(source), self._path(destination), timeout=timeout)
+
+    async def move_file(self, source, destination, timeout=None):
+        return await self._run(self.file_manager.move_file, self._path(source), self._path(destination), timeout=timeout)
+
+    async def rename_file(self, old_name, new_name, timeout=None):
+        return await self._run(self.file_manager.rename_file, self._path(old_name), self._path(new_name), timeout=timeout)
+
+    async def delete_file(self, filename, timeout=None):
+        return await self._run(self.file_manager.delete_file, self._path(filename), timeout=timeout)
+
+    async def create_file(self, filename, size=None, timeout=None):
+        return await self._run(self.file_manager.create_file, self._path(filename), size, timeout=timeout)
+
+    async def read_file(self, filename, timeout=None):
+        return await self._run(self.file_manager.read_file, self._path(filename), timeout=timeout)
+
+    async def compress(self, source, zip_name, parallel=False, timeout=None):
+        return await self._run(self.file_manager.compress, source, zip_name, parallel=parallel,
+                               directory=self.current_dir, timeout=timeout)
+
+    async def extract(self, zip_name, dest_dir=None, timeout=None):
+        return await self._run(self.file_manager.extract, zip_name, dest_dir,
+                               directory=self.current_dir, timeout=timeout)
+
+    async def hash_file(self, filename, algo="sha256", timeout=None):
+        return await self._run(self.file_manager.hash_file, self._path(filename), algo, timeout=timeout)
+
+    async def search_files(self, pattern, recursive=False, timeout=None):
+        return await self._run(self.file_manager.search_files, pattern, recursive,
+                               directory=self.current_dir, timeout=timeout)
+
+    async def iter_search(self, pattern, recursive=True, timeout=None):
+        """Yield matching relative paths one directory at a time.
+
+        Each directory is read on the executor, so matches arrive while the
+        walk is still running and cancelling the consumer stops the walk.
+        """
+        top = self.current_dir
+        needle = pattern.lower()
+        if not recursive:
+            entries = await self._run(self.file_manager.dir_entries, top, timeout=timeout)
+            for name, _ in entries:
+                if needle in name.lower():
+                    yield name
+            return
+        walker = iter(await self._run(self.file_manager.walk_names, top, timeout=timeout))
+        done = object()
+        while True:
+            step = await self._run(next, walker, done, timeout=timeout)
+            if step is done:
+                return
+            root, files = step
+            for name in files:
+                if needle in name.lower():
+                    yield os.path.relpath(os.path.join(root, name), top)
+
+    async def add_tag(self, filename, tag, timeout=None):
+        return await self._run(self.file_manager.add_tag, self._path(filename), tag, timeout=timeout)
+
+    async def remove_tag(self, filename, tag, timeout=None):
+        return await self._run(self.file_manager.remove_tag, self._path(filename), tag, timeout=timeout)
+
+    async def get_tags(self, filename, timeout=None):
+        return await self._run(self.file_manager.get_tags, self._path(filename), timeout=timeout)
+
+    async def search_by_tag(self, tag, recursive=False, timeout=None):
+        return await self._run(self.file_manager.search_by_tag, tag, recursive,
+                               directory=self.current_dir, timeout=timeout)
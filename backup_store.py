@@ -0,0 +1,217 @@
+import os
+import json
+import mmap
+import zlib
+import random
+import hashlib
+import logging
+import contextlib
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows): backup and gc must not overlap
+    fcntl = None
+
+MIN_CHUNK = 16 * 1024
+# Boundary roughly every 64KB past the minimum. Each byte is shifted one bit further left
+# per step, so bit k of the hash only depends on the last k + 1 bytes: test the top 16 bits,
+# which depend on the whole 64-byte window, not the low ones, which see only 16 bytes.
+AVG_CHUNK_MASK = ((1 << 16) - 1) << 48
+MAX_CHUNK = 256 * 1024
+GEAR_WINDOW = 64  # a gear hash only depends on the last 64 bytes
+GEAR = [random.Random(0x6679_6c65 + i).getrandbits(64) for i in range(256)]
+U64 = (1 << 64) - 1
+# Workers must not be forked from a process whose watcher/daemon threads may hold locks
+POOL_CONTEXT = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+def chunk_boundaries(data):
+    """Yield (start, end) of content-defined chunks of data using a gear rolling hash.
+
+    Boundaries depend only on nearby content, so an insertion early in a file
+    leaves the chunks after it unchanged and they deduplicate.
+    """
+    n = len(data)
+    start = 0
+    while start < n:
+        end = min(start + MAX_CHUNK, n)
+        if end - start <= MIN_CHUNK:
+            yield start, end
+            return
+        h = 0
+        # Start hashing one window before the minimum so boundary decisions match a full scan
+        for pos in range(start + MIN_CHUNK - GEAR_WINDOW, end):
+            h = ((h << 1) + GEAR[data[pos]]) & U64
+            if pos >= start + MIN_CHUNK and not h & AVG_CHUNK_MASK:
+                end = pos + 1
+                break
+        yield start, end
+        start = end
+
+@contextlib.contextmanager
+def store_lock(store, exclusive):
+    """Backups hold the store's lock file shared, gc holds it exclusively.
+
+    A running backup has written chunks its snapshot doesn't reference yet, so
+    gc must not run until it has finished; gc fails instead of waiting.
+    """
+    os.makedirs(store, exist_ok=True)
+    with open(os.path.join(store, "lock"), 'a') as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), (fcntl.LOCK_EX | fcntl.LOCK_NB) if exclusive else fcntl.LOCK_SH)
+            except BlockingIOError:
+                raise Exception(f"A backup into {store} is in progress")
+        yield
+
+def chunk_path(store, chunk_id):
+    return os.path.join(store, "chunks", chunk_id[:2], chunk_id)
+
+def store_file(path, store, level=6):
+    # Process-pool worker: chunk one file, write chunks the store doesn't have yet.
+    # Returns (chunk ids, new chunks, bytes written).
+    chunk_ids, new_chunks, written = [], 0, 0
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return chunk_ids, 0, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for start, end in chunk_boundaries(data):
+                chunk = data[start:end]
+                chunk_id = hashlib.sha256(chunk).hexdigest()
+                chunk_ids.append(chunk_id)
+                target = chunk_path(store, chunk_id)
+                if os.path.exists(target):
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                packed = zlib.compress(chunk, level)
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as out:
+                    out.write(packed)
+                os.replace(tmp_path, target)
+                new_chunks += 1
+                written += len(packed)
+    return chunk_ids, new_chunks, written
+
+def read_chunk(store, chunk_id):
+    with open(chunk_path(store, chunk_id), 'rb') as f:
+        chunk = zlib.decompress(f.read())
+    if hashlib.sha256(chunk).hexdigest() != chunk_id:
+        raise Exception(f"Chunk {chunk_id} is corrupt")
+    return chunk
+
+def snapshot_names(store):
+    snapshot_dir = os.path.join(store, "snapshots")
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(name[:-5] for name in os.listdir(snapshot_dir) if name.endswith(".json"))
+
+def load_snapshot(store, name):
+    with open(os.path.join(store, "snapshots", f"{name}.json"), 'r') as f:
+        return json.load(f)
+
+def _latest_snapshot_of(store, source):
+    for name in reversed(snapshot_names(store)):
+        snapshot = load_snapshot(store, name)
+        if snapshot["source"] == source:
+            return snapshot
+    return None
+
+def create_snapshot(source, store, workers=None, progress=None):
+    """Back up source into store and return (snapshot name, stats).
+
+    Files whose size and mtime match the previous snapshot of the same source
+    reuse its chunk list without being read. The rest are chunked and
+    compressed on a process pool; only chunks missing from the store are written.
+    """
+    with store_lock(store, exclusive=False):
+        return _create_snapshot(os.path.abspath(source), store, workers, progress)
+
+def _create_snapshot(source, store, workers, progress):
+    os.makedirs(os.path.join(store, "snapshots"), exist_ok=True)
+    previous = _latest_snapshot_of(store, source)
+    known = {f["path"]: f for f in previous["files"]} if previous else {}
+
+    dirs, files, pending = [], [], []
+    for root, dirnames, filenames in os.walk(source):
+        rel_root = os.path.relpath(root, source)
+        for name in sorted(dirnames):
+            dirs.append(os.path.normpath(os.path.join(rel_root, name)))
+        for name in sorted(filenames):
+            path = os.path.join(root, name)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            rel = os.path.normpath(os.path.join(rel_root, name))
+            record = {"path": rel, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "mode": st.st_mode & 0o7777}
+            old = known.get(rel)
+            if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                record["chunks"] = old["chunks"]
+            else:
+                pending.append(record)
+            files.append(record)
+
+    stats = {"files": len(files), "changed": len(pending), "new_chunks": 0, "written": 0}
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(POOL_CONTEXT)) as pool:
+            results = pool.map(store_file, [os.path.join(source, r["path"]) for r in pending],
+                               [store] * len(pending), chunksize=8)
+            for record, (chunk_ids, new_chunks, written) in zip(pending, results):
+                record["chunks"] = chunk_ids
+                stats["new_chunks"] += new_chunks
+                stats["written"] += written
+                if progress is not None:
+                    progress.update(1)
+
+    name = datetime.now().strftime("%Y%m%d-%H%M%S")
+    existing = set(snapshot_names(store))
+    suffix = 1
+    while name in existing:
+        suffix += 1
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix}"
+    snapshot = {"source": source, "created": datetime.now().isoformat(timespec="seconds"), "dirs": dirs, "files": files}
+    tmp_path = os.path.join(store, "snapshots", f"{name}.json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, os.path.join(store, "snapshots", f"{name}.json"))
+    logging.debug(f"Snapshot {name}: {stats}")
+    return name, stats
+
+def restore_snapshot(store, name, dest, progress=None):
+    snapshot = load_snapshot(store, name)
+    os.makedirs(dest, exist_ok=True)
+    for rel in snapshot["dirs"]:
+        os.makedirs(os.path.join(dest, rel), exist_ok=True)
+    for record in snapshot["files"]:
+        path = os.path.join(dest, record["path"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            for chunk_id in record["chunks"]:
+                f.write(read_chunk(store, chunk_id))
+        os.chmod(path, record["mode"])
+        os.utime(path, ns=(record["mtime_ns"], record["mtime_ns"]))
+        if progress is not None:
+            progress.update(1)
+    return len(snapshot["files"])
+
+def collect_garbage(store):
+    with store_lock(store, exclusive=True):
+        return _collect_garbage(store)
+
+def _collect_garbage(store):
+    # Delete chunks no snapshot references (and leftovers of interrupted writes)
+    referenced = set()
+    for name in snapshot_names(store):
+        for record in load_snapshot(store, name)["files"]:
+            referenced.update(record["chunks"])
+    removed = freed = 0
+    for root, _, filenames in os.walk(os.path.join(store, "chunks")):
+        for name in filenames:
+            if name in referenced:
+                continue
+            path = os.path.join(root, name)
+            freed += os.path.getsize(path)
+            os.remove(path)
+            removed += 1
+    return removed, freed
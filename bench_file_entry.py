@@ -0,0 +1,48 @@
+"""Memory/time comparison of listing representations.
+
+Usage: python bench_file_entry.py [entries]
+
+Builds N listing rows from one real stat result (so the filesystem is not
+measured) as get_file_info-style dicts, FileEntry objects and a
+FileEntryBatch, and reports traced peak memory and build time for each.
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from utils import FileEntry, FileEntryBatch
+
+def as_dicts(names, stats):
+    return [{
+        "name": name,
+        "size": f"{stats.st_size} bytes",
+        "modified": datetime.fromtimestamp(stats.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+        "is_dir": False
+    } for name in names]
+
+def as_entries(names, stats):
+    return [FileEntry.from_stat(name, stats) for name in names]
+
+def as_batch(names, stats):
+    return FileEntryBatch.from_stats((name, stats) for name in names)
+
+def measure(label, build, names, stats):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(names, stats)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<16} {peak / 1024 / 1024:8.1f} MB peak {elapsed:8.2f} s  ({len(result)} entries)")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    stats = os.stat(__file__)
+    names = [f"file_{i:07d}.dat" for i in range(count)]  # shared by all variants, not counted
+    measure("dict per file", as_dicts, names, stats)
+    measure("FileEntry", as_entries, names, stats)
+    measure("FileEntryBatch", as_batch, names, stats)
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,49 @@
 import os
-from datetime import datetime
+import io
+import sys
+import shutil
 from prompt_toolkit import PromptSession
 from prompt_toolkit.completion import WordCompleter, NestedCompleter
 from colorama import Fore, Style
-from utils import suggest_commands, run_script, get_file_completions, parse_variables
+from command_history import CommandHistory, PromptHistory
+from fuzzy import FuzzyIndex, SIMILAR
+from utils import FileEntry, run_script, size_to_bytes, get_file_completions, parse_variables
 
 class CLIInterface:
     def __init__(self, file_manager, config):
         self.file_manager = file_manager
         self.config = config
         self.running = False
-        self.history = []
+        self.history = CommandHistory(self.config["history_file"], self.config["max_history"])
         self.variables = {}  # Store variables for script usage
         self.commands = [
             "dir", "ls", "cd", "pwd", "del", "rm", 'create', "copy",
             "rename", "mv", "move", "view", "cat", "search", "perms",
             "edit", "history", "help", "exit", "batch_del", "batch_copy",
             "batch_move", "exec", "tag", "untag", "tags", "script", "tagsearch",
-            "compress", "extract", "chmod", "set", "hash"
+            "compress", "extract", "chmod", "set", "hash", "sync",
+            "watch", "unwatch",
+            "zipls", "zipcat", "manifest", "diff",
+            "backup", "restore", "snapshots", "backup_gc"
         ]
         self.completer = NestedCompleter.from_nested_dict({
             cmd: None if cmd in ["dir", "ls", "pwd", "history", "help", "exit"]
             else WordCompleter(get_file_completions(self.file_manager.get_current_dir()))
             for cmd in self.commands + list(self.config["aliases"].keys())
         })
-        self.session = PromptSession(completer=self.completer if self.config["completion_enabled"] else None,
-                                    complete_while_typing=True)
+        self.command_index = FuzzyIndex(dict.fromkeys(self.commands + list(self.config["aliases"].keys())), n=2)
+        self.session = None  # created in run(), so non-interactive use (daemon, scripts) needs no terminal
 
     def display_help(self):
         if self.config["color_enabled"]:
             print(f"{Fore.CYAN}\nCommands:{Style.RESET_ALL}")
             print(f"{Fore.GREEN}  dir/ls [detail] [sort] [min_size] [max_size]{Style.RESET_ALL} - List files")
-            print(f"{Fore.GREEN}  cd <path>{Style.RESET_ALL} - Change directory")
+            print(f"{Fore.GREEN}  dir/ls [sort=name|mtime|size|ext|none] [limit=N] [offset=N] [top=K] [reverse]{Style.RESET_ALL} - Paged or top-K listing")
+            print(f"{Fore.GREEN}  cd <path>{Style.RESET_ALL} - Change directory (abbreviations like prjrep resolve)")
             print(f"{Fore.GREEN}  pwd{Style.RESET_ALL} - Show current directory")
             print(f"{Fore.GREEN}  del/rm <name>{Style.RESET_ALL} - Delete file or directory")
             print(f"{Fore.GREEN}  batch_del <name1> <name2> ...{Style.RESET_ALL} - Batch delete files")
-            print(f"{Fore.GREEN}  create <name>{Style.RESET_ALL} - Create new empty file")
+            print(f"{Fore.GREEN}  create <name> [size]{Style.RESET_ALL} - Create new file, optionally preallocated (e.g., 10m)")
             print(f"{Fore.GREEN}  copy <source> <dest>{Style.RESET_ALL} - Copy file or directory")
             print(f"{Fore.GREEN}  batch_copy <source1> <source2> ... <dest>{Style.RESET_ALL} - Batch copy files")
             print(f"{Fore.GREEN}  rename/mv <old> <new>{Style.RESET_ALL} - Rename file or directory")
@@ -45,16 +53,29 @@ class CLIInterface:
             print(f"{Fore.GREEN}  search <pattern> [r]{Style.RESET_ALL} - Search files (r for recursive)")
             print(f"{Fore.GREEN}  perms <name>{Style.RESET_ALL} - View file permissions")
             print(f"{Fore.GREEN}  chmod <name> <perms>{Style.RESET_ALL} - Set file permissions (e.g., +x, 755)")
+            print(f"{Fore.GREEN}  chmod -r <dir> <perms> [only=<glob>]{Style.RESET_ALL} - Set permissions on everything under dir")
             print(f"{Fore.GREEN}  edit <name> <content>{Style.RESET_ALL} - Append text to file")
             print(f"{Fore.GREEN}  tag <name> <tag>{Style.RESET_ALL} - Add tag to file")
+            print(f"{Fore.GREEN}  tag -r <dir> <tag> [only=<glob>]{Style.RESET_ALL} - Add tag to every file under dir")
             print(f"{Fore.GREEN}  untag <name> <tag>{Style.RESET_ALL} - Remove tag from file")
             print(f"{Fore.GREEN}  tags <name>{Style.RESET_ALL} - Show tags for file")
             print(f"{Fore.GREEN}  tagsearch <tag> [r]{Style.RESET_ALL} - Search files by tag (r for recursive)")
-            print(f"{Fore.GREEN}  compress <source> <zip_name>{Style.RESET_ALL} - Compress file or directory to zip")
-            print(f"{Fore.GREEN}  extract <zip_name> [dest_dir]{Style.RESET_ALL} - Extract zip to directory")
+            print(f"{Fore.GREEN}  compress <source> <archive> [parallel]{Style.RESET_ALL} - Compress to .zip, .tar, .tar.gz, .tar.xz, .tar.bz2 or .tar.zst")
+            print(f"{Fore.GREEN}  extract <archive> [dest_dir]{Style.RESET_ALL} - Extract zip or tar archive to directory")
+            print(f"{Fore.GREEN}  zipls <zip> [glob]{Style.RESET_ALL} - List zip members with sizes and compression ratios")
+            print(f"{Fore.GREEN}  zipcat <zip> <member>{Style.RESET_ALL} - View one zip member without extracting")
             print(f"{Fore.GREEN}  set <var> <value>{Style.RESET_ALL} - Set a variable for scripts")
             print(f"{Fore.GREEN}  hash <name> [algo]{Style.RESET_ALL} - Compute file hash (algo: sha256/md5, default sha256)")
-            print(f"{Fore.GREEN}  history{Style.RESET_ALL} - Show command history with timestamps")
+            print(f"{Fore.GREEN}  sync <source> <dest> [delete] [hash] [dry]{Style.RESET_ALL} - Copy only new/changed files into dest")
+            print(f"{Fore.GREEN}  manifest <dir> <out.mf> [hash]{Style.RESET_ALL} - Write a sorted manifest of dir (hash: include digests)")
+            print(f"{Fore.GREEN}  diff <a.mf|dir> <b.mf|dir>{Style.RESET_ALL} - Show added, removed, modified and renamed files")
+            print(f"{Fore.GREEN}  backup <dir> <store>{Style.RESET_ALL} - Snapshot dir into a deduplicating backup store")
+            print(f"{Fore.GREEN}  restore <store> <snapshot> <dest>{Style.RESET_ALL} - Restore a snapshot into dest")
+            print(f"{Fore.GREEN}  snapshots <store>{Style.RESET_ALL} - List snapshots in a backup store")
+            print(f"{Fore.GREEN}  backup_gc <store>{Style.RESET_ALL} - Delete chunks no snapshot references")
+            print(f"{Fore.GREEN}  watch [dir]{Style.RESET_ALL} - Keep listings, search and tags in sync with outside changes (no dir: list watches)")
+            print(f"{Fore.GREEN}  unwatch <dir>{Style.RESET_ALL} - Stop watching a directory")
+            print(f"{Fore.GREEN}  history [search <text>]{Style.RESET_ALL} - Show command history with timestamps, or entries containing text")
             print(f"{Fore.GREEN}  exec <number>{Style.RESET_ALL} - Execute command from history")
             print(f"{Fore.GREEN}  script <filename>{Style.RESET_ALL} - Run commands from script file")
             print(f"{Fore.GREEN}  exit{Style.RESET_ALL} - Quit the program")
@@ -62,11 +83,12 @@ class CLIInterface:
         else:
             print("\nCommands:")
             print("  dir/ls [detail] [sort] [min_size] [max_size] - List files")
-            print("  cd <path> - Change directory")
+            print("  dir/ls [sort=name|mtime|size|ext|none] [limit=N] [offset=N] [top=K] [reverse] - Paged or top-K listing")
+            print("  cd <path> - Change directory (abbreviations like prjrep resolve)")
             print("  pwd - Show current directory")
             print("  del/rm <name> - Delete file or directory")
             print("  batch_del <name1> <name2> ... - Batch delete files")
-            print("  create <name> - Create new empty file")
+            print("  create <name> [size] - Create new file, optionally preallocated (e.g., 10m)")
             print("  copy <source> <dest> - Copy file or directory")
             print("  batch_copy <source1> <source2> ... <dest> - Batch copy files")
             print("  rename/mv <old> <new> - Rename file or directory")
@@ -76,28 +98,106 @@ class CLIInterface:
             print("  search <pattern> [r] - Search files (r for recursive)")
             print("  perms <name> - View file permissions")
             print("  chmod <name> <perms> - Set file permissions (e.g., +x, 755)")
+            print("  chmod -r <dir> <perms> [only=<glob>] - Set permissions on everything under dir")
             print("  edit <name> <content> - Append text to file")
             print("  tag <name> <tag> - Add tag to file")
+            print("  tag -r <dir> <tag> [only=<glob>] - Add tag to every file under dir")
             print("  untag <name> <tag> - Remove tag from file")
             print("  tags <name> - Show tags for file")
             print("  tagsearch <tag> [r] - Search files by tag (r for recursive)")
-            print("  compress <source> <zip_name> - Compress file or directory to zip")
-            print("  extract <zip_name> [dest_dir] - Extract zip to directory")
+            print("  compress <source> <archive> [parallel] - Compress to .zip, .tar, .tar.gz, .tar.xz, .tar.bz2 or .tar.zst")
+            print("  extract <archive> [dest_dir] - Extract zip or tar archive to directory")
+            print("  zipls <zip> [glob] - List zip members with sizes and compression ratios")
+            print("  zipcat <zip> <member> - View one zip member without extracting")
             print("  set <var> <value> - Set a variable for scripts")
             print("  hash <name> [algo] - Compute file hash (algo: sha256/md5, default sha256)")
-            print("  history - Show command history with timestamps")
+            print("  sync <source> <dest> [delete] [hash] [dry] - Copy only new/changed files into dest")
+            print("  manifest <dir> <out.mf> [hash] - Write a sorted manifest of dir (hash: include digests)")
+            print("  diff <a.mf|dir> <b.mf|dir> - Show added, removed, modified and renamed files")
+            print("  backup <dir> <store> - Snapshot dir into a deduplicating backup store")
+            print("  restore <store> <snapshot> <dest> - Restore a snapshot into dest")
+            print("  snapshots <store> - List snapshots in a backup store")
+            print("  backup_gc <store> - Delete chunks no snapshot references")
+            print("  watch [dir] - Keep listings, search and tags in sync with outside changes (no dir: list watches)")
+            print("  unwatch <dir> - Stop watching a directory")
+            print("  history [search <text>] - Show command history with timestamps, or entries containing text")
             print("  exec <number> - Execute command from history")
             print("  script <filename> - Run commands from script file")
             print("  exit - Quit the program")
             print("  help - Show this message") 
 
+    def page_output(self, chunks):
+        # Prints text a screenful at a time when attached to a terminal
+        page_size = shutil.get_terminal_size().lines - 1 if sys.stdout.isatty() else None
+        shown = 0
+        pending = ""
+        for chunk in chunks:
+            pending += chunk
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                print(line)
+                shown += 1
+                if page_size and shown % page_size == 0:
+                    if input("-- More -- (Enter to continue, q to quit) ").strip().lower() == "q":
+                        return
+        if pending:
+            print(pending)
+
+    def list_directory(self, command):
+        # Positional form: dir [detail] [sort] [min_size] [max_size]
+        # Options: sort=<name|mtime|size|ext|none> limit=<n> offset=<n> top=<k> min=<size> max=<size> reverse
+        positional = [arg for arg in command[1:] if "=" not in arg and arg.lower() != "reverse"]
+        options = dict(arg.split("=", 1) for arg in command[1:] if "=" in arg)
+        detailed = len(positional) > 0 and positional[0].lower() == "detail"
+        sort_by = options.get("sort", positional[1] if len(positional) > 1 else self.config["default_sort"]).lower()
+        min_size = options.get("min", positional[2] if len(positional) > 2 else self.config["min_size"])
+        max_size = options.get("max", positional[3] if len(positional) > 3 else self.config["max_size"])
+        limit = int(options["limit"]) if "limit" in options else None
+        offset = int(options.get("offset", 0))
+        top = int(options["top"]) if "top" in options else None
+        reverse = any(arg.lower() == "reverse" for arg in command[1:])
+        if sort_by not in ["name", "mtime", "size", "ext", "none"]:
+            sort_by = self.config["default_sort"]
+        if sort_by == "none":
+            # Unsorted listings print while the directory is still being read
+            files = self.file_manager.iter_files(detailed, min_size, max_size, limit, offset)
+        else:
+            files = self.file_manager.list_files(detailed, sort_by, min_size, max_size,
+                                                 limit=limit, offset=offset, top=top, reverse=reverse)
+        for f in files:
+            if self.config["color_enabled"]:
+                if isinstance(f, FileEntry) and f.is_dir:
+                    print(f"{Fore.BLUE}{f['name']}{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.WHITE}{f}{Style.RESET_ALL}")
+            else:
+                print(f)
+
+    def print_bulk_result(self, summary, result):
+        for rel_path, error in result["errors"].items():
+            print(f"{Fore.RED}{rel_path}: {error}{Style.RESET_ALL}" if self.config["color_enabled"] else f"{rel_path}: {error}")
+        summary = f"{summary}: {result['changed']} changed, {result['skipped']} already set"
+        print(f"{Fore.GREEN}{summary}{Style.RESET_ALL}" if self.config["color_enabled"] else summary)
+
     def resolve_alias(self, cmd):
         return self.config.get("aliases", {}).get(cmd, cmd)
-    
-    def trim_history(self):
-        if len(self.history) > self.config["max_history"]:
-            self.history = self.history[-self.config["max_history"]:]
 
+    def resolve_target(self, name, want_dir):
+        # Fuzzy fallback for cd/view: a unique prefix or abbreviation resolves; ambiguous
+        # matches and typos only get suggestions.
+        # Returns the name to use, or None when suggestions were printed instead.
+        if not self.config["autocomplete"] or os.path.exists(os.path.join(self.file_manager.get_current_dir(), name)):
+            return name
+        matches = self.file_manager.fuzzy_matches(name, want_dir)  # all from the best tier with a match
+        if len(matches) == 1 and matches[0][1] < SIMILAR:
+            print(f"{Fore.CYAN}{name} -> {matches[0][0]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"{name} -> {matches[0][0]}")
+            return matches[0][0]
+        if matches:
+            suggestions = ", ".join(match for match, _ in matches)
+            print(f"{Fore.RED}No such {'directory' if want_dir else 'file'}: {name}. Did you mean: {suggestions}?{Style.RESET_ALL}" if self.config["color_enabled"] else f"No such {'directory' if want_dir else 'file'}: {name}. Did you mean: {suggestions}?")
+            return None
+        return name
+    
     def run(self):
         self.running = True
         print("""
@@ -108,6 +208,10 @@ class CLIInterface:
             /_/      _\__, / /_/  \___/ 
                      /____/              
             Type 'help' for commands  v0.15""")
+
+        if self.session is None:
+            self.session = PromptSession(completer=self.completer if self.config["completion_enabled"] else None,
+                                         complete_while_typing=True, history=PromptHistory(self.history))
         
         while self.running:
             try:
@@ -115,268 +219,328 @@ class CLIInterface:
                 if not command:
                     continue
                     
-                cmd = self.resolve_alias(command[0].lower())
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                self.history.append((timestamp, " ".join(command)))
-                self.trim_history()
-                
-                if cmd in ["exit", "quit"]:
-                    self.running = False
-                elif cmd in ["dir", "ls"]:
-                    detailed = len(command) > 1 and command[1].lower() == "detail"
-                    sort_by = command[2].lower() if len(command) > 2 else self.config["default_sort"]
-                    min_size = command[3] if len(command) > 3 else self.config["min_size"]
-                    max_size = command[4] if len(command) > 4 else self.config["max_size"]
-                    if sort_by not in ["name", "mtime"]:
-                        sort_by = self.config["default_sort"]
-                    files = self.file_manager.list_files(detailed, sort_by, min_size, max_size)
-                    if self.config["color_enabled"]:
-                        for f in files:
-                            if isinstance(f, dict) and f.get("is_dir"):
-                                print(f"{Fore.BLUE}{f['name']}{Style.RESET_ALL}")
-                            else:
-                                print(f"{Fore.WHITE}{f}{Style.RESET_ALL}")
-                    else:
-                        print("\n".join(str(f) for f in files))
-                elif cmd == "cd" and len(command) > 1:
-                    result = self.file_manager.change_dir(command[1])
-                    if result is not True:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "pwd":
-                    if self.config["color_enabled"]:
-                        print(f"{Fore.CYAN}{self.file_manager.get_current_dir()}{Style.RESET_ALL}")
-                    else:
-                        print(self.file_manager.get_current_dir())
-                elif cmd in ["del", "rm"] and len(command) > 1:
-                    result = self.file_manager.delete_file(command[1])
-                    if result is True:
-                        print(f"{Fore.GREEN}Deleted: {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Deleted: {command[1]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "batch_del" and len(command) > 1 and self.config["batch_enabled"]:
-                    results = self.file_manager.batch_delete(command[1:], progress=self.config["progress_enabled"])
-                    for fname, result in results.items():
-                        if self.config["color_enabled"]:
-                            color = Fore.GREEN if result == "Success" else Fore.RED
-                            print(f"{color}{fname}: {result}{Style.RESET_ALL}")
-                        else:
-                            print(f"{fname}: {result}")
-                elif cmd == "create" and len(command) > 1:
-                    result = self.file_manager.create_file(command[1])
-                    if result is True:
-                        print(f"{Fore.GREEN}Created: {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Created: {command[1]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "copy" and len(command) > 2:
-                    result = self.file_manager.copy_file(command[1], command[2])
-                    if result is True:
-                        print(f"{Fore.GREEN}Copied {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Copied {command[1]} to {command[2]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "batch_copy" and len(command) > 2 and self.config["batch_enabled"]:
-                    sources = command[1:-1]
-                    dest = command[-1]
-                    results = self.file_manager.batch_copy(sources, dest, progress=self.config["progress_enabled"])
-                    for src, result in results.items():
-                        if self.config["color_enabled"]:
-                            color = Fore.GREEN if result == "Success" else Fore.RED
-                            print(f"{color}{src} -> {dest}: {result}{Style.RESET_ALL}")
-                        else:
-                            print(f"{src} -> {dest}: {result}")
-                elif cmd in ["rename", "mv"] and len(command) > 2:
-                    result = self.file_manager.rename_file(command[1], command[2])
-                    if result is True:
-                        print(f"{Fore.GREEN}Renamed {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Renamed {command[1]} to {command[2]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "move" and len(command) > 2:
-                    result = self.file_manager.move_file(command[1], command[2])
-                    if result is True:
-                        print(f"{Fore.GREEN}Moved {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Moved {command[1]} to {command[2]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "batch_move" and len(command) > 2 and self.config["batch_enabled"]:
-                    sources = command[1:-1]
-                    dest = command[-1]
-                    results = self.file_manager.batch_move(sources, dest, progress=self.config["progress_enabled"])
-                    for src, result in results.items():
-                        if self.config["color_enabled"]:
-                            color = Fore.GREEN if result == "Success" else Fore.RED
-                            print(f"{color}{src} -> {dest}: {result}{Style.RESET_ALL}")
-                        else:
-                            print(f"{src} -> {dest}: {result}")
-                elif cmd in ["view", "cat"] and len(command) > 1:
-                    result = self.file_manager.read_file(command[1])
-                    if isinstance(result, str) and not result.startswith("Error"):
-                        if self.config["color_enabled"]:
-                            print(f"{Fore.CYAN}\nContents of {command[1]}:{Style.RESET_ALL}\n{result}")
-                        else:
-                            print(f"\nContents of {command[1]}:\n{result}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "search" and len(command) > 1:
-                    recursive = (len(command) > 2 and command[2].lower() == "r") or self.config["search_recursive"]
-                    result = self.file_manager.search_files(command[1], recursive)
-                    if isinstance(result, list):
-                        if self.config["color_enabled"]:
-                            print(f"{Fore.YELLOW}\nFound {len(result)} matches:{Style.RESET_ALL}")
-                            print("\n".join(f"{Fore.WHITE}{f}{Style.RESET_ALL}" for f in result))
-                        else:
-                            print(f"\nFound {len(result)} matches:")
-                            print("\n".join(result))
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "perms" and len(command) > 1:
-                    result = self.file_manager.get_file_permissions(command[1])
-                    if isinstance(result, str) and not result.startswith("Error"):
-                        if self.config["color_enabled"]:
-                            print(f"{Fore.CYAN}\nPermissions for {command[1]}: {result}{Style.RESET_ALL}")
-                        else:
-                            print(f"\nPermissions for {command[1]}: {result}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "chmod" and len(command) > 2:
-                    result = self.file_manager.set_file_permissions(command[1], command[2])
-                    if result is True:
-                        print(f"{Fore.GREEN}Set permissions for {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Set permission for {command[1]} to {command[2]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "edit" and len(command) > 2:
-                    content = " ".join(command[2:])
-                    result = self.file_manager.edit_file(command[1], content)
-                    if result is True:
-                        print(f"{Fore.GREEN}Appended to {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Appended to {command[1]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "tag" and len(command) > 2 and self.config["tags_enabled"]:
-                    result = self.file_manager.add_tag(command[1], command[2])
-                    if result is True:
-                        print(f"{Fore.GREEN}Tagged {command[1]} with '{command[2]}'{Style.RESET_ALL}" if self.config["color_enabled"] else f"Tagged {command[1]} with '{command[2]}'")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "untag" and len(command) > 2 and self.config["tags_enabled"]:
-                    result = self.file_manager.remove_tag(command[1], command[2])
-                    if result is True:
-                        print(f"{Fore.GREEN}Removed tag '{command[2]}' from {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Removed tag '{command[2]}' from {command[1]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "tags" and len(command) > 1 and self.config["tags_enabled"]:
-                    tags = self.file_manager.get_tags(command[1])
-                    if isinstance(tags, list):
-                        if self.config["color_enabled"]:
-                            print(f"{Fore.CYAN}Tags for {command[1]}: {', '.join(tags) if tags else 'None'}{Style.RESET_ALL}")
-                        else:
-                            print(f"Tags for {command[1]}: {', '.join(tags) if tags else 'None'}")
-                    else:
-                        print(f"{Fore.RED}Error: {tags}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {tags}")
-                elif cmd == "tagsearch" and len(command) > 1 and self.config["tags_enabled"]:
-                    recursive = (len(command) > 2 and command[2].lower() == "r")
-                    result = self.file_manager.search_by_tag(command[1], recursive)
-                    if isinstance(result, list):
-                        if self.config["color_enabled"]:
-                            print(f"{Fore.YELLOW}\nFound {len(result)} files with tag '{command[1]}':{Style.RESET_ALL}")
-                            print("\n".join(f"{Fore.WHITE}{f}{Style.RESET_ALL}" for f in result))
-                        else:
-                            print(f"\nFound {len(result)} files with tag '{command[1]}':")
-                            print("\n".join(result))
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "compress" and len(command) > 2:
-                    result = self.file_manager.compress(command[1], command[2], progress=self.config["progress_enabled"])
-                    if result is True:
-                        print(f"{Fore.GREEN}Compressed {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Compressed {command[1]} to {command[2]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "extract" and len(command) > 1:
-                    dest_dir = command[2] if len(command) > 2 else None
-                    result = self.file_manager.extract(command[1], dest_dir, progress=self.config["progress_enabled"])
-                    if result is True:
-                        dest = dest_dir if dest_dir else "current directory"
-                        print(f"{Fore.GREEN}Extracted {command[1]} to {dest}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Extracted {command[1]} to {dest}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "set" and len(command) > 2 and self.config["variables_enabled"]:
-                    var_name = command[1]
-                    var_value = " ".join(command[2:])
-                    self.variables[var_name] = var_value
-                    if self.config["color_enabled"]:
-                        print(f"{Fore.GREEN}Set {var_name} = {var_value}{Style.RESET_ALL}")
-                    else:
-                        print(f"Set {var_name} = {var_value}")
-                elif cmd == "hash" and len(command) > 1:
-                    algo = command[2] if len(command) > 2 else "sha256"
-                    if algo not in ["sha256", "md5"]:
-                        algo = "sha256"
-                    result = self.file_manager.hash_file(command[1], algo)
-                    if isinstance(result, str) and not result.startswith("Error"):
-                        if self.config["color_enabled"]:
-                            print(f"{Fore.CYAN}{algo.upper()} hash of {command[1]}: {result}{Style.RESET_ALL}")
-                        else:
-                            print(f"{algo.upper()} hash of {command[1]}: {result}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "history":
-                    if self.config["color_enabled"]:
-                        for i, (ts, cmd) in enumerate(self.history, 1):
-                            print(f"{Fore.MAGENTA}{i}. [{ts}] {cmd}{Style.RESET_ALL}")
-                    else:
-                        for i, (ts, cmd) in enumerate(self.history, 1):
-                            print(f"{i}. [{ts}] {cmd}")
-                elif cmd == "exec" and len(command) > 1:
-                    try:
-                        index = int(command[1]) - 1
-                        if 0 <= index < len(self.history):
-                            _, old_cmd = self.history[index]
-                            if self.config["color_enabled"]:
-                                print(f"{Fore.YELLOW}Executing: {old_cmd}{Style.RESET_ALL}")
-                            else:
-                                print(f"Executing: {old_cmd}")
-                            self.history.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), old_cmd))
-                            self.trim_history()
-                            self.run_command(old_cmd.split())
-                        else:
-                            print(f"{Fore.RED}Invalid history index{Style.RESET_ALL}" if self.config["color_enabled"] else "Invalid history index")
-                    except ValueError:
-                        print(f"{Fore.RED}Invalid index - use a number{Style.RESET_ALL}" if self.config["color_enabled"] else "Invalid index - use a number")
-                elif cmd == "script" and len(command) > 1:
-                    script_path = os.path.join(self.config["script_dir"], command[1])
-                    result = run_script(script_path, self)
-                    if result is True:
-                        print(f"{Fore.GREEN}Executed script: {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Executed script: {command[1]}")
-                    else:
-                        print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
-                elif cmd == "help":
-                    self.display_help()
-                else:
-                    if self.config["autocomplete"]:
-                        suggestions = suggest_commands(cmd, self.commands + list(self.config["aliases"].keys()))
-                        if suggestions:
-                            if self.config["color_enabled"]:
-                                print(f"{Fore.RED}Unknown command. Did you mean: {', '.join(suggestions)}?{Style.RESET_ALL}")
-                            else:
-                                print(f"Unknown command. Did you mean: {', '.join(suggestions)}?")
-                        else:
-                            print(f"{Fore.RED}Unknown command. Type 'help' for available commands{Style.RESET_ALL}" if self.config["color_enabled"] else "Unknown command. Type 'help' for available commands")
-                    else:
-                        print(f"{Fore.RED}Unknown command. Type 'help' for available commands{Style.RESET_ALL}" if self.config["color_enabled"] else "Unknown command. Type 'help' for available commands")
+                self.history.add(" ".join(command))
+                self.run_command(command)
+                self.file_manager.flush_writes()
             except Exception as e:
                 print(f"{Fore.RED}Error: {str(e)}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {str(e)}")
 
     def run_command(self, command):
         cmd = self.resolve_alias(command[0].lower())
-        if cmd in ["dir", "ls"]:
-            detailed = len(command) > 1 and command[1].lower() == "detail"
-            sort_by = command[2].lower() if len(command) > 2 else self.config["default_sort"]
-            min_size = command[3] if len(command) > 3 else self.config["min_size"]
-            max_size = command[4] if len(command) > 4 else self.config["max_size"]
-            if sort_by not in ["name", "mtime"]:
-                sort_by = self.config["default_sort"]
-            files = self.file_manager.list_files(detailed, sort_by, min_size, max_size)
+        if cmd != "edit":
+            self.file_manager.flush_writes()  # other commands must see (and may move) the edited files
+        if cmd in ["exit", "quit"]:
+            self.running = False
+        elif cmd in ["dir", "ls"]:
+            self.list_directory(command)
+        elif cmd == "cd" and len(command) > 1:
+            target = self.resolve_target(command[1], want_dir=True)
+            result = self.file_manager.change_dir(target) if target else True
+            if result is not True:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "pwd":
             if self.config["color_enabled"]:
-                for f in files:
-                    if isinstance(f, dict) and f.get("is_dir"):
-                        print(f"{Fore.BLUE}{f['name']}{Style.RESET_ALL}")
+                print(f"{Fore.CYAN}{self.file_manager.get_current_dir()}{Style.RESET_ALL}")
+            else:
+                print(self.file_manager.get_current_dir())
+        elif cmd in ["del", "rm"] and len(command) > 1:
+            result = self.file_manager.delete_file(command[1])
+            if result is True:
+                print(f"{Fore.GREEN}Deleted: {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Deleted: {command[1]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "batch_del" and len(command) > 1 and self.config["batch_enabled"]:
+            results = self.file_manager.batch_delete(command[1:], progress=self.config["progress_enabled"])
+            for fname, result in results.items():
+                if self.config["color_enabled"]:
+                    color = Fore.GREEN if result == "Success" else Fore.RED
+                    print(f"{color}{fname}: {result}{Style.RESET_ALL}")
+                else:
+                    print(f"{fname}: {result}")
+        elif cmd == "create" and len(command) > 1:
+            result = self.file_manager.create_file(command[1], size_to_bytes(command[2]) if len(command) > 2 else None)
+            if result is True:
+                print(f"{Fore.GREEN}Created: {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Created: {command[1]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "copy" and len(command) > 2:
+            result = self.file_manager.copy_file(command[1], command[2])
+            if result is True:
+                print(f"{Fore.GREEN}Copied {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Copied {command[1]} to {command[2]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "batch_copy" and len(command) > 2 and self.config["batch_enabled"]:
+            sources = command[1:-1]
+            dest = command[-1]
+            results = self.file_manager.batch_copy(sources, dest, progress=self.config["progress_enabled"])
+            for src, result in results.items():
+                if self.config["color_enabled"]:
+                    color = Fore.GREEN if result == "Success" else Fore.RED
+                    print(f"{color}{src} -> {dest}: {result}{Style.RESET_ALL}")
+                else:
+                    print(f"{src} -> {dest}: {result}")
+        elif cmd in ["rename", "mv"] and len(command) > 2:
+            result = self.file_manager.rename_file(command[1], command[2])
+            if result is True:
+                print(f"{Fore.GREEN}Renamed {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Renamed {command[1]} to {command[2]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "move" and len(command) > 2:
+            result = self.file_manager.move_file(command[1], command[2])
+            if result is True:
+                print(f"{Fore.GREEN}Moved {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Moved {command[1]} to {command[2]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "batch_move" and len(command) > 2 and self.config["batch_enabled"]:
+            sources = command[1:-1]
+            dest = command[-1]
+            results = self.file_manager.batch_move(sources, dest, progress=self.config["progress_enabled"])
+            for src, result in results.items():
+                if self.config["color_enabled"]:
+                    color = Fore.GREEN if result == "Success" else Fore.RED
+                    print(f"{color}{src} -> {dest}: {result}{Style.RESET_ALL}")
+                else:
+                    print(f"{src} -> {dest}: {result}")
+        elif cmd in ["view", "cat"] and len(command) > 1:
+            target = self.resolve_target(command[1], want_dir=False)
+            if not target:
+                return
+            result = self.file_manager.read_file(target)
+            if isinstance(result, str) and not result.startswith("Error"):
+                if self.config["color_enabled"]:
+                    print(f"{Fore.CYAN}\nContents of {target}:{Style.RESET_ALL}")
+                else:
+                    print(f"\nContents of {target}:")
+                self.page_output([result])
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "zipls" and len(command) > 1:
+            members = self.file_manager.list_archive(command[1], command[2] if len(command) > 2 else None)
+            lines = []
+            for name, size, compressed in members:
+                ratio = f"{100 - compressed * 100 / size:5.1f}%" if size else "  0.0%"
+                lines.append(f"{size:>12} {compressed:>12} {ratio}  {name}\n")
+            if self.config["color_enabled"]:
+                print(f"{Fore.YELLOW}{'Size':>12} {'Compressed':>12}  Saved  Name{Style.RESET_ALL}")
+            else:
+                print(f"{'Size':>12} {'Compressed':>12}  Saved  Name")
+            self.page_output(lines)
+            print(f"{Fore.CYAN}{len(members)} members{Style.RESET_ALL}" if self.config["color_enabled"] else f"{len(members)} members")
+        elif cmd == "zipcat" and len(command) > 2:
+            stream = self.file_manager.open_archive_member(command[1], command[2])
+            with io.TextIOWrapper(stream, encoding="utf-8", errors="replace") as text:
+                if self.config["color_enabled"]:
+                    print(f"{Fore.CYAN}\nContents of {command[2]} in {command[1]}:{Style.RESET_ALL}")
+                else:
+                    print(f"\nContents of {command[2]} in {command[1]}:")
+                self.page_output(iter(lambda: text.read(64 * 1024), ""))
+        elif cmd == "search" and len(command) > 1:
+            recursive = (len(command) > 2 and command[2].lower() == "r") or self.config["search_recursive"]
+            result = self.file_manager.search_files(command[1], recursive)
+            if isinstance(result, list):
+                if self.config["color_enabled"]:
+                    print(f"{Fore.YELLOW}\nFound {len(result)} matches:{Style.RESET_ALL}")
+                    print("\n".join(f"{Fore.WHITE}{f}{Style.RESET_ALL}" for f in result))
+                else:
+                    print(f"\nFound {len(result)} matches:")
+                    print("\n".join(result))
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "perms" and len(command) > 1:
+            result = self.file_manager.get_file_permissions(command[1])
+            if isinstance(result, str) and not result.startswith("Error"):
+                if self.config["color_enabled"]:
+                    print(f"{Fore.CYAN}\nPermissions for {command[1]}: {result}{Style.RESET_ALL}")
+                else:
+                    print(f"\nPermissions for {command[1]}: {result}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "chmod" and len(command) > 3 and command[1] == "-r":
+            only = next((arg.split("=", 1)[1] for arg in command[4:] if arg.startswith("only=")), None)
+            result = self.file_manager.set_permissions_recursive(command[2], command[3], only)
+            self.print_bulk_result(f"Set permissions {command[3]} under {command[2]}", result)
+        elif cmd == "chmod" and len(command) > 2:
+            result = self.file_manager.set_file_permissions(command[1], command[2])
+            if result is True:
+                print(f"{Fore.GREEN}Set permissions for {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Set permission for {command[1]} to {command[2]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "edit" and len(command) > 2:
+            content = " ".join(command[2:])
+            result = self.file_manager.edit_file(command[1], content, buffered=True)
+            if result is True:
+                print(f"{Fore.GREEN}Appended to {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Appended to {command[1]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "tag" and len(command) > 3 and command[1] == "-r" and self.config["tags_enabled"]:
+            only = next((arg.split("=", 1)[1] for arg in command[4:] if arg.startswith("only=")), None)
+            result = self.file_manager.add_tag_recursive(command[2], command[3], only)
+            self.print_bulk_result(f"Tagged files under {command[2]} with '{command[3]}'", result)
+        elif cmd == "tag" and len(command) > 2 and self.config["tags_enabled"]:
+            result = self.file_manager.add_tag(command[1], command[2])
+            if result is True:
+                print(f"{Fore.GREEN}Tagged {command[1]} with '{command[2]}'{Style.RESET_ALL}" if self.config["color_enabled"] else f"Tagged {command[1]} with '{command[2]}'")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "untag" and len(command) > 2 and self.config["tags_enabled"]:
+            result = self.file_manager.remove_tag(command[1], command[2])
+            if result is True:
+                print(f"{Fore.GREEN}Removed tag '{command[2]}' from {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Removed tag '{command[2]}' from {command[1]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "tags" and len(command) > 1 and self.config["tags_enabled"]:
+            tags = self.file_manager.get_tags(command[1])
+            if isinstance(tags, list):
+                if self.config["color_enabled"]:
+                    print(f"{Fore.CYAN}Tags for {command[1]}: {', '.join(tags) if tags else 'None'}{Style.RESET_ALL}")
+                else:
+                    print(f"Tags for {command[1]}: {', '.join(tags) if tags else 'None'}")
+            else:
+                print(f"{Fore.RED}Error: {tags}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {tags}")
+        elif cmd == "tagsearch" and len(command) > 1 and self.config["tags_enabled"]:
+            recursive = (len(command) > 2 and command[2].lower() == "r")
+            result = self.file_manager.search_by_tag(command[1], recursive)
+            if isinstance(result, list):
+                if self.config["color_enabled"]:
+                    print(f"{Fore.YELLOW}\nFound {len(result)} files with tag '{command[1]}':{Style.RESET_ALL}")
+                    print("\n".join(f"{Fore.WHITE}{f}{Style.RESET_ALL}" for f in result))
+                else:
+                    print(f"\nFound {len(result)} files with tag '{command[1]}':")
+                    print("\n".join(result))
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "compress" and len(command) > 2:
+            parallel = len(command) > 3 and command[3].lower() == "parallel"
+            result = self.file_manager.compress(command[1], command[2], progress=self.config["progress_enabled"], parallel=parallel)
+            if result is True:
+                print(f"{Fore.GREEN}Compressed {command[1]} to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Compressed {command[1]} to {command[2]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "extract" and len(command) > 1:
+            dest_dir = command[2] if len(command) > 2 else None
+            result = self.file_manager.extract(command[1], dest_dir, progress=self.config["progress_enabled"])
+            if result is True:
+                dest = dest_dir if dest_dir else "current directory"
+                print(f"{Fore.GREEN}Extracted {command[1]} to {dest}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Extracted {command[1]} to {dest}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "set" and len(command) > 2 and self.config["variables_enabled"]:
+            var_name = command[1]
+            var_value = " ".join(command[2:])
+            self.variables[var_name] = var_value
+            if self.config["color_enabled"]:
+                print(f"{Fore.GREEN}Set {var_name} = {var_value}{Style.RESET_ALL}")
+            else:
+                print(f"Set {var_name} = {var_value}")
+        elif cmd == "hash" and len(command) > 1:
+            algo = command[2] if len(command) > 2 else "sha256"
+            if algo not in ["sha256", "md5"]:
+                algo = "sha256"
+            result = self.file_manager.hash_file(command[1], algo)
+            if isinstance(result, str) and not result.startswith("Error"):
+                if self.config["color_enabled"]:
+                    print(f"{Fore.CYAN}{algo.upper()} hash of {command[1]}: {result}{Style.RESET_ALL}")
+                else:
+                    print(f"{algo.upper()} hash of {command[1]}: {result}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "sync" and len(command) > 2:
+            options = [o.lower() for o in command[3:]]
+            result = self.file_manager.sync_dirs(command[1], command[2], delete="delete" in options,
+                                                 checksum="hash" in options, dry_run="dry" in options,
+                                                 progress=self.config["progress_enabled"])
+            if "dry" in options:
+                plan = result["plan"]
+                for rel, size, reason in plan["copies"]:
+                    print(f"{Fore.YELLOW}{reason}: {rel} ({size} bytes){Style.RESET_ALL}" if self.config["color_enabled"] else f"{reason}: {rel} ({size} bytes)")
+                for rel, _ in plan["deletes"]:
+                    print(f"{Fore.RED}delete: {rel}{Style.RESET_ALL}" if self.config["color_enabled"] else f"delete: {rel}")
+                summary = f"Would copy {result['copies']} files ({result['bytes']} bytes), delete {result['deletes']}"
+            else:
+                summary = (f"Synced {command[1]} to {command[2]}: {result['copied']} copied ({result['deltas']} by delta), "
+                           f"{result['written']} bytes written, {result['deleted']} deleted")
+                for rel, error in result["errors"].items():
+                    print(f"{Fore.RED}{rel}: {error}{Style.RESET_ALL}" if self.config["color_enabled"] else f"{rel}: {error}")
+            print(f"{Fore.GREEN}{summary}{Style.RESET_ALL}" if self.config["color_enabled"] else summary)
+        elif cmd == "watch":
+            if len(command) > 1:
+                mode = self.file_manager.watch(command[1])
+                print(f"{Fore.GREEN}Watching {command[1]} ({mode}){Style.RESET_ALL}" if self.config["color_enabled"] else f"Watching {command[1]} ({mode})")
+            else:
+                for root, watcher in self.file_manager.watchers.items():
+                    print(f"{Fore.CYAN}{root} ({watcher.mode}){Style.RESET_ALL}" if self.config["color_enabled"] else f"{root} ({watcher.mode})")
+        elif cmd == "unwatch" and len(command) > 1:
+            self.file_manager.unwatch(command[1])
+            print(f"{Fore.GREEN}Stopped watching {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Stopped watching {command[1]}")
+        elif cmd == "manifest" and len(command) > 2:
+            digests = len(command) > 3 and command[3].lower() == "hash"
+            count = self.file_manager.create_manifest(command[1], command[2], digests)
+            print(f"{Fore.GREEN}Wrote {count} entries to {command[2]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Wrote {count} entries to {command[2]}")
+        elif cmd == "diff" and len(command) > 2:
+            result = self.file_manager.diff_trees(command[1], command[2])
+            lines = ([(Fore.GREEN, f"+ {p}") for p in result["added"]] +
+                     [(Fore.RED, f"- {p}") for p in result["removed"]] +
+                     [(Fore.YELLOW, f"M {p}") for p in result["modified"]] +
+                     [(Fore.CYAN, f"R {old} -> {new}") for old, new in result["renamed"]])
+            for color, line in lines:
+                print(f"{color}{line}{Style.RESET_ALL}" if self.config["color_enabled"] else line)
+            summary = (f"{len(result['added'])} added, {len(result['removed'])} removed, "
+                       f"{len(result['modified'])} modified, {len(result['renamed'])} renamed")
+            print(f"{Fore.CYAN}{summary}{Style.RESET_ALL}" if self.config["color_enabled"] else summary)
+        elif cmd == "backup" and len(command) > 2:
+            name, stats = self.file_manager.backup(command[1], command[2], progress=self.config["progress_enabled"])
+            summary = (f"Snapshot {name}: {stats['changed']} of {stats['files']} files changed, "
+                       f"{stats['new_chunks']} new chunks ({stats['written']} bytes written)")
+            print(f"{Fore.GREEN}{summary}{Style.RESET_ALL}" if self.config["color_enabled"] else summary)
+        elif cmd == "restore" and len(command) > 3:
+            count = self.file_manager.restore(command[1], command[2], command[3], progress=self.config["progress_enabled"])
+            print(f"{Fore.GREEN}Restored {count} files to {command[3]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Restored {count} files to {command[3]}")
+        elif cmd == "snapshots" and len(command) > 1:
+            for name in self.file_manager.list_snapshots(command[1]):
+                print(f"{Fore.CYAN}{name}{Style.RESET_ALL}" if self.config["color_enabled"] else name)
+        elif cmd == "backup_gc" and len(command) > 1:
+            removed, freed = self.file_manager.backup_gc(command[1])
+            print(f"{Fore.GREEN}Removed {removed} unreferenced chunks ({freed} bytes){Style.RESET_ALL}" if self.config["color_enabled"] else f"Removed {removed} unreferenced chunks ({freed} bytes)")
+        elif cmd == "history":
+            if len(command) > 2 and command[1].lower() == "search":
+                entries = self.history.search(" ".join(command[2:]))
+            else:
+                entries = [(i, ts, old_cmd) for i, (ts, old_cmd) in enumerate(self.history, 1)]
+            for i, ts, old_cmd in entries:
+                print(f"{Fore.MAGENTA}{i}. [{ts}] {old_cmd}{Style.RESET_ALL}" if self.config["color_enabled"] else f"{i}. [{ts}] {old_cmd}")
+        elif cmd == "exec" and len(command) > 1:
+            try:
+                index = int(command[1]) - 1
+                if 0 <= index < len(self.history):
+                    _, old_cmd = self.history[index]
+                    if self.config["color_enabled"]:
+                        print(f"{Fore.YELLOW}Executing: {old_cmd}{Style.RESET_ALL}")
+                    else:
+                        print(f"Executing: {old_cmd}")
+                    self.history.add(old_cmd)
+                    self.run_command(old_cmd.split())
+                else:
+                    print(f"{Fore.RED}Invalid history index{Style.RESET_ALL}" if self.config["color_enabled"] else "Invalid history index")
+            except ValueError:
+                print(f"{Fore.RED}Invalid index - use a number{Style.RESET_ALL}" if self.config["color_enabled"] else "Invalid index - use a number")
+        elif cmd == "script" and len(command) > 1:
+            script_path = os.path.join(self.config["script_dir"], command[1])
+            result = run_script(script_path, self)
+            if result is True:
+                print(f"{Fore.GREEN}Executed script: {command[1]}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Executed script: {command[1]}")
+            else:
+                print(f"{Fore.RED}Error: {result}{Style.RESET_ALL}" if self.config["color_enabled"] else f"Error: {result}")
+        elif cmd == "help":
+            self.display_help()
+        else:
+            if self.config["autocomplete"]:
+                suggestions = self.command_index.suggest(cmd)
+                if suggestions:
+                    if self.config["color_enabled"]:
+                        print(f"{Fore.RED}Unknown command. Did you mean: {', '.join(suggestions)}?{Style.RESET_ALL}")
                     else:
-                        print(f"{Fore.WHITE}{f}{Style.RESET_ALL}")
+                        print(f"Unknown command. Did you mean: {', '.join(suggestions)}?")
+                else:
+                    print(f"{Fore.RED}Unknown command. Type 'help' for available commands{Style.RESET_ALL}" if self.config["color_enabled"] else "Unknown command. Type 'help' for available commands")
             else:
-                print("\n".join(str(f) for f in files))
\ No newline at end of file
+                print(f"{Fore.RED}Unknown command. Type 'help' for available commands{Style.RESET_ALL}" if self.config["color_enabled"] else "Unknown command. Type 'help' for available commands")
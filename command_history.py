@@ -0,0 +1,161 @@
+import os
+import logging
+from collections import defaultdict
+from datetime import datetime
+from prompt_toolkit.history import History
+
+TAIL_BLOCK_SIZE = 64 * 1024
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class CommandHistory(History):
+    """Command history of the CLI, recalled at the prompt through PromptHistory.
+
+    The newest max_entries commands live in a fixed-size ring with a trigram
+    index for substring search. Every command is also appended to
+    history_file as a "timestamp<TAB>command" line; the file is never
+    rewritten, and startup only reads as much of its tail as the ring holds.
+    """
+
+    def __init__(self, history_file, max_entries):
+        super().__init__()
+        self.history_file = os.path.abspath(history_file)
+        self.max_entries = max(1, max_entries)
+        self.slots = [None] * self.max_entries  # ring: entry seq lives in slots[seq % max_entries]
+        self.first_seq = 0
+        self.next_seq = 0
+        self.index = defaultdict(set)  # trigram -> seqs
+        self._file = None
+        for timestamp, command in self._read_tail():
+            self._remember(timestamp, command)
+
+    def _read_tail(self):
+        try:
+            with open(self.history_file, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                data = b""
+                while end > 0 and data.count(b"\n") <= self.max_entries:
+                    start = max(0, end - TAIL_BLOCK_SIZE)
+                    f.seek(start)
+                    data = f.read(end - start) + data
+                    end = start
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logging.error(f"Failed to load history: {str(e)}")
+            return []
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        if end > 0:
+            lines = lines[1:]  # first line may be cut off mid-entry
+        entries = []
+        for line in lines[-self.max_entries:]:
+            timestamp, sep, command = line.partition("\t")
+            if sep and command:
+                entries.append((timestamp, command))
+        return entries
+
+    def _remember(self, timestamp, command):
+        seq = self.next_seq
+        if seq - self.first_seq >= self.max_entries:
+            _, old_command = self.slots[self.first_seq % self.max_entries]
+            for tri in _trigrams(old_command.lower()):
+                postings = self.index[tri]
+                postings.discard(self.first_seq)
+                if not postings:
+                    del self.index[tri]
+            self.first_seq += 1
+        self.slots[seq % self.max_entries] = (timestamp, command)
+        self.next_seq += 1
+        for tri in _trigrams(command.lower()):
+            self.index[tri].add(seq)
+
+    def add(self, command):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        command = command.replace("\n", " ").replace("\t", " ")
+        self._remember(timestamp, command)
+        try:
+            if self._file is None:
+                self._file = open(self.history_file, 'a', encoding="utf-8")
+            self._file.write(f"{timestamp}\t{command}\n")
+            self._file.flush()
+        except Exception as e:
+            logging.error(f"Failed to save history: {str(e)}")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def search(self, text):
+        # Returns (number, timestamp, command) for entries containing text, oldest first
+        needle = text.lower()
+        if len(needle) >= 3:
+            postings = sorted((self.index.get(tri, set()) for tri in _trigrams(needle)), key=len)
+            seqs = sorted(set(postings[0]).intersection(*postings[1:]))
+        else:
+            seqs = range(self.first_seq, self.next_seq)
+        results = []
+        for seq in seqs:
+            timestamp, command = self.slots[seq % self.max_entries]
+            if needle in command.lower():
+                results.append((seq - self.first_seq + 1, timestamp, command))
+        return results
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    def __getitem__(self, position):
+        if not 0 <= position < len(self):
+            raise IndexError("history index out of range")
+        return self.slots[(self.first_seq + position) % self.max_entries]
+
+    def __iter__(self):
+        return (self.slots[seq % self.max_entries] for seq in range(self.first_seq, self.next_seq))
+
+    # prompt_toolkit History interface, answered from the ring alone: the base class
+    # would also keep every command in an unbounded _loaded_strings list
+    def load_history_strings(self):
+        return [self.slots[seq % self.max_entries][1] for seq in range(self.next_seq - 1, self.first_seq - 1, -1)]
+
+    async def load(self):
+        for command in self.load_history_strings():
+            yield command
+
+    def get_strings(self):
+        return [command for _, command in self]
+
+    def append_string(self, string):
+        self.add(string)
+
+    def store_string(self, string):
+        self.add(string)
+
+class PromptHistory(History):
+    """Arrow-key recall of a CommandHistory for a PromptSession.
+
+    The session appends each accepted line unless it repeats the previous
+    one; those appends are ignored, since the CLI records every command it
+    runs in the CommandHistory itself.
+    """
+
+    def __init__(self, history):
+        super().__init__()
+        self.history = history
+
+    def load_history_strings(self):
+        return self.history.load_history_strings()
+
+    async def load(self):
+        for command in self.history.load_history_strings():
+            yield command
+
+    def get_strings(self):
+        return self.history.get_strings()
+
+    def append_string(self, string):
+        pass
+
+    def store_string(self, string):
+        pass
@@ -0,0 +1,157 @@
+import os
+import io
+import json
+import stat
+import socket
+import asyncio
+import logging
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from utils import FileEntry
+
+# FileManager methods reachable through the "call" method
+CALLABLE_METHODS = {
+    "list_files", "get_current_dir", "change_dir", "delete_file", "create_file", "copy_file",
+    "rename_file", "move_file", "read_file", "search_files", "get_file_permissions",
+    "set_file_permissions", "edit_file", "add_tag", "remove_tag", "get_tags", "search_by_tag",
+    "compress", "extract", "hash_file", "sync_dirs", "list_archive", "watch", "unwatch"
+}
+
+class DaemonError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+def _jsonable(value):
+    if isinstance(value, FileEntry):
+        return value.to_dict()  # the get_file_info-style dict listings were before FileEntry
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)) or hasattr(value, "__next__"):
+        return [_jsonable(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+class FyleDaemon:
+    """Serves a warm CLIInterface/FileManager over newline-delimited JSON-RPC 2.0
+    on a Unix socket.
+
+    Methods: "run" ({"command": [...], "cwd": ...}) executes a CLI command and
+    returns its printed output; "call" ({"method", "args", "kwargs", "cwd"})
+    invokes a FileManager method; "ping" and "shutdown". Blocking work runs on
+    a thread pool; requests are applied one at a time because they share the
+    current directory and stdout capture.
+    """
+
+    def __init__(self, cli, socket_path, workers=4):
+        self.cli = cli
+        self.file_manager = cli.file_manager
+        self.socket_path = socket_path
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fyle-daemon")
+        self.state_lock = threading.Lock()
+        self._stopped = None
+
+    def _enter_cwd(self, cwd):
+        if cwd and cwd != self.file_manager.get_current_dir():
+            self.file_manager.change_dir(cwd)
+
+    def _run_command(self, command, cwd=None):
+        if not command:
+            raise DaemonError(-32602, "Empty command")
+        output = io.StringIO()
+        with self.state_lock:
+            self._enter_cwd(cwd)
+            self.cli.history.add(" ".join(command))
+            with contextlib.redirect_stdout(output):
+                try:
+                    self.cli.run_command(command)
+                    self.file_manager.flush_writes()
+                except Exception as e:
+                    print(f"Error: {str(e)}")
+        return {"output": output.getvalue()}
+
+    def _call(self, method, args=None, kwargs=None, cwd=None):
+        if method not in CALLABLE_METHODS:
+            raise DaemonError(-32601, f"Unknown FileManager method: {method}")
+        with self.state_lock:
+            self._enter_cwd(cwd)
+            return _jsonable(getattr(self.file_manager, method)(*(args or []), **(kwargs or {})))
+
+    async def _dispatch(self, request):
+        method = request.get("method")
+        params = request.get("params") or {}
+        loop = asyncio.get_running_loop()
+        if method == "ping":
+            return "pong"
+        if method == "shutdown":
+            self._stopped.set()
+            return True
+        if method == "run":
+            return await loop.run_in_executor(self.pool, lambda: self._run_command(params.get("command"), params.get("cwd")))
+        if method == "call":
+            return await loop.run_in_executor(self.pool, lambda: self._call(
+                params.get("method"), params.get("args"), params.get("kwargs"), params.get("cwd")))
+        raise DaemonError(-32601, f"Method not found: {method}")
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = {"jsonrpc": "2.0", "id": None}
+                try:
+                    request = json.loads(line)
+                    response["id"] = request.get("id")
+                    response["result"] = await self._dispatch(request)
+                except json.JSONDecodeError as e:
+                    response["error"] = {"code": -32700, "message": f"Parse error: {str(e)}"}
+                except DaemonError as e:
+                    response["error"] = {"code": e.code, "message": str(e)}
+                except Exception as e:
+                    logging.error(f"Daemon request failed: {str(e)}")
+                    response["error"] = {"code": -32000, "message": str(e)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # client went away, or the daemon is shutting down with the connection open
+        finally:
+            writer.close()
+
+    def _clear_stale_socket(self):
+        # Only remove a leftover socket nobody is listening on; never a file or a live daemon
+        try:
+            st = os.lstat(self.socket_path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(st.st_mode):
+            raise Exception(f"{self.socket_path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except ConnectionRefusedError:
+            os.remove(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise Exception(f"Another daemon is already listening on {self.socket_path}")
+
+    async def serve(self):
+        self._clear_stale_socket()
+        self._stopped = asyncio.Event()
+        old_umask = os.umask(0o177)  # socket is created owner-only, with no window before a chmod
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        finally:
+            os.umask(old_umask)
+        logging.info(f"Daemon listening on {self.socket_path}")
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            self.pool.shutdown(wait=False)
+            if os.path.exists(self.socket_path) and stat.S_ISSOCK(os.lstat(self.socket_path).st_mode):
+                os.remove(self.socket_path)
+            logging.info("Daemon stopped")
@@ -0,0 +1,26 @@
+import os
+import sys
+import json
+import socket
+
+# Kept free of asyncio/prompt_toolkit imports so a forwarded command starts fast
+
+def request(socket_path, method, params=None, timeout=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}).encode() + b"\n")
+        with sock.makefile('rb') as f:
+            response = json.loads(f.readline())
+    if "error" in response:
+        raise Exception(response["error"]["message"])
+    return response["result"]
+
+def run_client(socket_path, command):
+    try:
+        result = request(socket_path, "run", {"command": command, "cwd": os.getcwd()})
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    sys.stdout.write(result["output"])
+    return 0
@@ -0,0 +1,219 @@
+import os
+import shutil
+import hashlib
+import logging
+import mmap
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+BLOCK_SIZE = 64 * 1024
+DELTA_THRESHOLD = 8 * 1024 * 1024
+ROLL_WINDOWS = 4  # block-sized windows per file searched byte by byte for shifted data
+GIVE_UP_WINDOWS = 2  # unmatched blocks at the start of a file before a delta gives up
+ADLER_MOD = 65521
+
+def iter_tree(root, rel=""):
+    # Yields (relative path, lstat result, is_dir) in depth-first order
+    with os.scandir(os.path.join(root, rel) if rel else root) as it:
+        entries = list(it)
+    for entry in entries:
+        path = os.path.join(rel, entry.name) if rel else entry.name
+        st = entry.stat(follow_symlinks=False)
+        is_dir = entry.is_dir(follow_symlinks=False)
+        yield path, st, is_dir
+        if is_dir:
+            yield from iter_tree(root, path)
+
+def _same_file(src_st, dst_st):
+    return src_st.st_size == dst_st.st_size and src_st.st_mtime_ns == dst_st.st_mtime_ns
+
+def plan_sync(source, destination, delete=False, checksum=False, digest=None):
+    plan = {"mkdirs": [], "copies": [], "touch": [], "deletes": [], "bytes": 0}
+    seen = set()
+    for rel, src_st, is_dir in iter_tree(source):
+        seen.add(rel)
+        dst_path = os.path.join(destination, rel)
+        try:
+            dst_st = os.lstat(dst_path)
+        except FileNotFoundError:
+            dst_st = None
+        if is_dir:
+            if dst_st is None:
+                plan["mkdirs"].append(rel)
+            continue
+        if dst_st is None:
+            plan["copies"].append((rel, src_st.st_size, "new"))
+            plan["bytes"] += src_st.st_size
+        elif not _same_file(src_st, dst_st):
+            if (checksum and digest and src_st.st_size == dst_st.st_size
+                    and digest(os.path.join(source, rel)) == digest(dst_path)):
+                plan["touch"].append(rel)
+                continue
+            plan["copies"].append((rel, src_st.st_size, "changed"))
+            plan["bytes"] += src_st.st_size
+    if delete and os.path.isdir(destination):
+        plan["deletes"] = list(_extraneous(destination, seen))
+    return plan
+
+def _extraneous(destination, seen, rel=""):
+    # Entries in destination missing from source; does not descend into them
+    with os.scandir(os.path.join(destination, rel) if rel else destination) as it:
+        entries = list(it)
+    for entry in entries:
+        path = os.path.join(rel, entry.name) if rel else entry.name
+        is_dir = entry.is_dir(follow_symlinks=False)
+        if path not in seen:
+            yield path, is_dir
+        elif is_dir:
+            yield from _extraneous(destination, seen, path)
+
+def _block_signatures(dst_map, block_size):
+    sigs = {}
+    for index in range(len(dst_map) // block_size):
+        block = dst_map[index * block_size:(index + 1) * block_size]
+        sigs.setdefault(zlib.adler32(block), {}).setdefault(hashlib.md5(block).digest(), index)
+    return sigs
+
+def _lookup(sigs, block):
+    candidates = sigs.get(zlib.adler32(block))
+    return candidates.get(hashlib.md5(block).digest()) if candidates else None
+
+def _roll(src_map, sigs, pos, block_size):
+    # Roll the adler32 window one byte at a time over (pos, pos + block_size) looking for
+    # a destination block; returns (offset, block index) or None. Pure Python, ~1us a byte.
+    n = len(src_map)
+    weak = zlib.adler32(src_map[pos:pos + block_size])
+    for start in range(pos, min(pos + block_size - 1, n - block_size)):
+        out_byte, in_byte = src_map[start], src_map[start + block_size]
+        a = ((weak & 0xffff) - out_byte + in_byte) % ADLER_MOD
+        b = ((weak >> 16) - block_size * out_byte + a - 1) % ADLER_MOD
+        weak = (b << 16) | a
+        candidates = sigs.get(weak)
+        if candidates:
+            index = candidates.get(hashlib.md5(src_map[start + 1:start + 1 + block_size]).digest())
+            if index is not None:
+                return start + 1, index
+    return None
+
+def _delta_ops(src_map, sigs, block_size, roll_windows):
+    # rsync-style matching, emitting ("copy", block, offset) / ("data", start, end).
+    # Each source block is first looked up where it stands (C-speed hashing), which
+    # covers in-place edits and appends. Only when that misses is the window rolled
+    # byte by byte to find data shifted by an insertion or deletion, at most
+    # roll_windows times per file. Giving up after GIVE_UP_WINDOWS misses with
+    # nothing matched keeps wholesale rewrites from costing more than a full copy.
+    ops = []
+    n = len(src_map)
+    pos = literal_start = misses = 0
+    while pos + block_size <= n:
+        index = _lookup(sigs, src_map[pos:pos + block_size])
+        if index is None and roll_windows > 0:
+            roll_windows -= 1
+            found = _roll(src_map, sigs, pos, block_size)
+            if found:
+                pos, index = found
+        if index is None:
+            misses += 1
+            if misses >= GIVE_UP_WINDOWS and not ops:
+                return None
+            pos += block_size
+            continue
+        if literal_start < pos:
+            ops.append(("data", literal_start, pos))
+        ops.append(("copy", index, pos))
+        pos += block_size
+        literal_start = pos
+    if literal_start < n:
+        ops.append(("data", literal_start, n))
+    return ops
+
+def delta_copy(src_path, dst_path, block_size=BLOCK_SIZE, roll_windows=ROLL_WINDOWS):
+    """Rewrite dst_path to match src_path, transferring only changed blocks.
+
+    Returns the number of literal bytes written, or None if the files are too
+    different for a delta to pay off (the caller should do a full copy).
+    """
+    with open(src_path, 'rb') as sf, open(dst_path, 'r+b') as df:
+        src_size = os.fstat(sf.fileno()).st_size
+        dst_size = os.fstat(df.fileno()).st_size
+        if src_size == 0 or dst_size < block_size:
+            return None
+        with mmap.mmap(sf.fileno(), 0, access=mmap.ACCESS_READ) as src_map, \
+                mmap.mmap(df.fileno(), 0, access=mmap.ACCESS_READ) as dst_map:
+            ops = _delta_ops(src_map, _block_signatures(dst_map, block_size), block_size, roll_windows)
+            if ops is None:
+                return None
+            written = sum(end - start for kind, start, end in ops if kind == "data")
+            in_place = all(index * block_size == offset for kind, index, offset in ops if kind == "copy")
+            if in_place:
+                # Matched blocks already sit at the right offsets: patch the gaps only
+                for kind, start, end in ops:
+                    if kind == "data":
+                        df.seek(start)
+                        df.write(src_map[start:end])
+                df.truncate(src_size)
+            else:
+                tmp_path = f"{dst_path}.fyle-sync.tmp"
+                with open(tmp_path, 'wb') as tf:
+                    for kind, a, b in ops:
+                        if kind == "copy":
+                            tf.write(dst_map[a * block_size:(a + 1) * block_size])
+                        else:
+                            tf.write(src_map[a:b])
+    if not in_place:
+        os.replace(tmp_path, dst_path)
+    shutil.copystat(src_path, dst_path)
+    return written
+
+def sync_file(src_path, dst_path, delta_threshold=DELTA_THRESHOLD):
+    # Returns (bytes written, used delta)
+    if os.path.islink(src_path):
+        if os.path.lexists(dst_path):
+            os.remove(dst_path)
+        shutil.copy2(src_path, dst_path, follow_symlinks=False)
+        return 0, False
+    if os.path.isfile(dst_path) and os.path.getsize(src_path) >= delta_threshold:
+        written = delta_copy(src_path, dst_path)
+        if written is not None:
+            return written, True
+    shutil.copy2(src_path, dst_path)
+    return os.path.getsize(dst_path), False
+
+def run_sync(source, destination, plan, workers=None, progress=None):
+    summary = {"copied": 0, "deltas": 0, "deleted": 0, "written": 0, "errors": {}}
+    os.makedirs(destination, exist_ok=True)
+    for rel in plan["mkdirs"]:
+        os.makedirs(os.path.join(destination, rel), exist_ok=True)
+    for rel in plan["touch"]:
+        shutil.copystat(os.path.join(source, rel), os.path.join(destination, rel))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(sync_file, os.path.join(source, rel), os.path.join(destination, rel)): rel
+            for rel, _, _ in plan["copies"]
+        }
+        for future in as_completed(futures):
+            rel = futures[future]
+            try:
+                written, used_delta = future.result()
+                summary["copied"] += 1
+                summary["deltas"] += used_delta
+                summary["written"] += written
+            except Exception as e:
+                logging.error(f"Sync failed for {rel}: {str(e)}")
+                summary["errors"][rel] = str(e)
+            if progress:
+                progress.update(1)
+
+    for rel, is_dir in plan["deletes"]:
+        path = os.path.join(destination, rel)
+        try:
+            if is_dir:
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            summary["deleted"] += 1
+        except Exception as e:
+            logging.error(f"Sync delete failed for {rel}: {str(e)}")
+            summary["errors"][rel] = str(e)
+    return summary
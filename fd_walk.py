@@ -0,0 +1,73 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_CLOEXEC", 0)
+
+def _walk(dir_fd, rel, visit, errors):
+    # visit(dir_fd, entry, rel_path, phase): phase is "file" for non-directories,
+    # "pre" / "post" around the descent into a directory. Symlinks are never followed.
+    try:
+        with os.scandir(dir_fd) as it:
+            entries = list(it)
+    except OSError as e:
+        errors[rel or "."] = str(e)
+        return
+    for entry in entries:
+        rel_path = os.path.join(rel, entry.name) if rel else entry.name
+        try:
+            if not entry.is_dir(follow_symlinks=False):
+                visit(dir_fd, entry, rel_path, "file")
+                continue
+            visit(dir_fd, entry, rel_path, "pre")
+            _descend(dir_fd, entry.name, rel_path, visit, errors)
+            visit(dir_fd, entry, rel_path, "post")
+        except OSError as e:
+            errors[rel_path] = str(e)
+
+def _descend(dir_fd, name, rel_path, visit, errors):
+    fd = os.open(name, DIR_FLAGS, dir_fd=dir_fd)
+    try:
+        _walk(fd, rel_path, visit, errors)
+    finally:
+        os.close(fd)
+
+def walk_tree(top, visit, workers=None):
+    """Walk top once through directory file descriptors, calling visit for every entry.
+
+    Entries are addressed by name relative to their parent's fd (scandir(fd),
+    dir_fd= syscalls), so no full path is resolved per file. Each top-level
+    subdirectory is walked on its own worker thread. Returns {rel_path: error}.
+    """
+    if not (os.scandir in os.supports_fd and os.open in os.supports_dir_fd):
+        raise Exception("directory file descriptors are not supported on this platform")
+    errors = {}
+    top_fd = os.open(top, DIR_FLAGS)
+    try:
+        with os.scandir(top_fd) as it:
+            entries = list(it)
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    visit(top_fd, entry, entry.name, "pre")
+                    subdirs.append(entry)
+                else:
+                    visit(top_fd, entry, entry.name, "file")
+            except OSError as e:
+                errors[entry.name] = str(e)
+
+        def walk_subtree(entry):
+            try:
+                _descend(top_fd, entry.name, entry.name, visit, errors)
+                visit(top_fd, entry, entry.name, "post")
+            except OSError as e:
+                errors[entry.name] = str(e)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(walk_subtree, subdirs))
+    finally:
+        os.close(top_fd)
+    if errors:
+        logging.warning(f"Walk of {top} hit {len(errors)} errors")
+    return errors
@@ -4,13 +4,36 @@ import json
 import logging
 import zipfile
 import hashlib
+import stat
+import threading
+import fnmatch
+import heapq
+import itertools
+from collections import OrderedDict
 from tqdm import tqdm
-from utils import get_file_info, get_permissions, size_to_bytes, set_permissions
+from utils import FileEntry, get_permissions, size_to_bytes, set_permissions, compute_mode
+from dir_sync import plan_sync, run_sync
+from fs_watch import DirectoryWatcher
+from fd_walk import walk_tree
+from backup_store import create_snapshot, restore_snapshot, collect_garbage, snapshot_names
+from manifest import scan_tree, read_manifest, write_manifest, diff_entries
+from fuzzy import FuzzyIndex
+from write_buffer import WriteBufferPool
+from archive import tar_format, detect_format, walk_sources, write_tar, iter_tar_extract
 
 class FileManager:
     def __init__(self):
         self.current_dir = os.getcwd()
-        self.tags_file = 'tags.json'
+        self.tags_file = os.path.abspath('tags.json')  # stays put when cd changes the process cwd
+        self.digest_cache = {}  # (path, algo) -> (size, mtime_ns, digest)
+        self.dir_cache = {}  # watched directory -> {name: stat}, kept fresh by watchers
+        self.watchers = {}
+        self.archive_cache = OrderedDict()  # zip path -> (mtime_ns, size, open ZipFile)
+        self.archive_cache_size = 8
+        self.fuzzy_cache = OrderedDict()  # directory -> (mtime_ns or None if watched, FuzzyIndex, directory names)
+        self.fuzzy_cache_size = 8
+        self.write_buffers = WriteBufferPool()
+        self.lock = threading.RLock()
         self.load_tags()
 
     def load_tags(self):
@@ -26,38 +49,147 @@ class FileManager:
 
     def save_tags(self):
         try:
-            with open(self.tags_file, 'w') as f:
+            with self.lock, open(self.tags_file, 'w') as f:
                 json.dump(self.tags, f, indent=2)
             logging.debug("Tags saved successfully")
         except Exception as e:
             logging.error(f"Failed to save tags: {str(e)}")
 
-    def list_files(self, detailed=False, sort_by="name", min_size=0, max_size=None):
+    def _list_key(self, sort_by, name, st):
+        # Key tuples are built once per entry so sorting and heap selection compare plain tuples
+        if sort_by == "mtime":
+            return (st.st_mtime_ns, name)
+        if sort_by == "size":
+            return (st.st_size, name)
+        if sort_by == "ext":
+            return (os.path.splitext(name)[1].lower(), name)
+        return (name,)
+
+    def _filtered_entries(self, directory, min_size, max_size):
+        min_size_bytes = size_to_bytes(min_size)
+        max_size_bytes = size_to_bytes(max_size) if max_size else float('inf')
+        for name, st in self.iter_dir_entries(directory):
+            if min_size_bytes <= st.st_size <= max_size_bytes:
+                yield name, st
+
+    def list_files(self, detailed=False, sort_by="name", min_size=0, max_size=None,
+                   limit=None, offset=0, top=None, reverse=False, directory=None):
         try:
-            files = os.listdir(self.current_dir)
-            full_paths = [os.path.join(self.current_dir, f) for f in files]
-            
-            filtered_paths = []
-            for path in full_paths:
-                size = os.path.getsize(path)
-                min_size_bytes = size_to_bytes(min_size)
-                max_size_bytes = size_to_bytes(max_size) if max_size else float('inf')
-                if min_size_bytes <= size <= max_size_bytes:
-                    filtered_paths.append(path)
-            
-            if sort_by == "mtime":
-                filtered_paths.sort(key=lambda x: os.path.getmtime(x))
+            directory = directory or self.current_dir
+            if sort_by == "none":
+                return list(self.iter_files(detailed, min_size, max_size, limit, offset, directory))
+
+            entries = self._filtered_entries(directory, min_size, max_size)
+            keyed = ((self._list_key(sort_by, name, st), name, st) for name, st in entries)
+            count = limit if top is None else top if limit is None else min(top, limit)
+            if count is not None:
+                # Only offset + count entries are needed: keep a bounded heap instead of sorting everything
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                ordered = select(offset + count, keyed)[offset:]
             else:
-                filtered_paths.sort()
-                
-            files = [os.path.basename(p) for p in filtered_paths]
+                ordered = sorted(keyed, reverse=reverse)[offset:]
+
             if detailed:
-                return [get_file_info(p) for p in filtered_paths]
-            return files
+                return [FileEntry.from_stat(name, st) for _, name, st in ordered]
+            return [name for _, name, _ in ordered]
         except Exception as e:
             logging.error(f"Failed to list files: {str(e)}")
             raise Exception(f"List operation failed: {str(e)}")
 
+    def iter_files(self, detailed=False, min_size=0, max_size=None, limit=None, offset=0, directory=None):
+        # Unsorted listing in directory order, yielded as entries are read
+        directory = directory or self.current_dir
+        entries = self._filtered_entries(directory, min_size, max_size)
+        stop = offset + limit if limit is not None else None
+        for name, st in itertools.islice(entries, offset, stop):
+            yield FileEntry.from_stat(name, st) if detailed else name
+
+    def iter_dir_entries(self, directory):
+        # (name, stat) pairs, served from the watch cache when the directory is watched
+        with self.lock:
+            cached = self.dir_cache.get(directory)
+            cached = list(cached.items()) if cached is not None else None
+        if cached is not None:
+            yield from cached
+            return
+        with os.scandir(directory) as it:
+            for entry in it:
+                yield entry.name, entry.stat()
+
+    def dir_entries(self, directory):
+        return list(self.iter_dir_entries(directory))
+
+    def _fuzzy_index(self, directory):
+        # Name index of a directory. A watched directory's index is kept in step with
+        # dir_cache by _refresh_path; any other is brought up to date when its mtime changes.
+        with self.lock:
+            cached = self.fuzzy_cache.get(directory)
+            watched = self.dir_cache.get(directory)
+            if watched is not None:
+                if cached is None or cached[0] is not None:
+                    dirs = {name for name, st in watched.items() if stat.S_ISDIR(st.st_mode)}
+                    cached = self._cache_fuzzy_index(directory, None, FuzzyIndex(watched), dirs)
+                self.fuzzy_cache.move_to_end(directory)
+                return cached[1], cached[2]
+        mtime_ns = os.stat(directory).st_mtime_ns
+        if cached and cached[0] == mtime_ns:
+            with self.lock:
+                if directory in self.fuzzy_cache:
+                    self.fuzzy_cache.move_to_end(directory)
+            return cached[1], cached[2]
+        names, dirs = set(), set()
+        with os.scandir(directory) as it:
+            for entry in it:  # d_type only, no stat per entry
+                names.add(entry.name)
+                if entry.is_dir():
+                    dirs.add(entry.name)
+        with self.lock:
+            # Another thread may have brought the cached index up to date (or dropped it) meanwhile
+            cached = self.fuzzy_cache.get(directory)
+            if cached and cached[0] is not None:
+                index = cached[1]
+                index.update(added=names.difference(index.ids), removed=[n for n in index.ids if n not in names])
+            else:
+                index = FuzzyIndex(names)
+            self._cache_fuzzy_index(directory, mtime_ns, index, dirs)
+        return index, dirs
+
+    def _cache_fuzzy_index(self, directory, mtime_ns, index, dirs):
+        cached = self.fuzzy_cache[directory] = (mtime_ns, index, dirs)
+        if len(self.fuzzy_cache) > self.fuzzy_cache_size:
+            self.fuzzy_cache.popitem(last=False)
+        return cached
+
+    def fuzzy_matches(self, name, want_dir=None, limit=3, directory=None):
+        """Existing entries that name could refer to, as [(path, tier)] best first.
+
+        Only the last component of name is matched fuzzily; want_dir=True/False
+        restricts matches to directories/non-directories.
+        """
+        try:
+            head, tail = os.path.split(name.rstrip(os.sep))
+            parent = os.path.join(directory or self.current_dir, head)
+            if not tail or not os.path.isdir(parent):
+                return []
+            index, dirs = self._fuzzy_index(os.path.abspath(parent))
+            accept = None if want_dir is None else (lambda n: (n in dirs) == want_dir)
+            with self.lock:  # watcher threads update the index in place through _refresh_path
+                matches = index.match(tail, limit, accept)
+            return [(os.path.join(head, match), tier) for match, tier in matches]
+        except Exception as e:
+            logging.error(f"Failed to match {name}: {str(e)}")
+            raise Exception(f"Fuzzy match failed: {str(e)}")
+
+    def walk_names(self, top):
+        # Like os.walk(top) yielding (root, files), but answered from the watch cache when possible
+        with self.lock:
+            if top in self.dir_cache:
+                prefix = top + os.sep
+                listing = [(root, [name for name, st in entries.items() if not stat.S_ISDIR(st.st_mode)])
+                           for root, entries in self.dir_cache.items() if root == top or root.startswith(prefix)]
+                return listing
+        return ((root, files) for root, _, files in os.walk(top))
+
     def change_dir(self, path):
         try:
             new_path = os.path.abspath(path)
@@ -79,9 +211,11 @@ class FileManager:
                 os.remove(full_path)
             elif os.path.isdir(full_path):
                 shutil.rmtree(full_path)
-            if full_path in self.tags:
-                del self.tags[full_path]
-                self.save_tags()
+            self._note_changes(full_path)
+            with self.lock:
+                if full_path in self.tags:
+                    del self.tags[full_path]
+                    self.save_tags()
             logging.info(f"Deleted: {filename}")
             return True
         except Exception as e:
@@ -98,12 +232,18 @@ class FileManager:
                 results[filename] = str(e)
         return results
 
-    def create_file(self, filename):
+    def create_file(self, filename, size=None):
         try:
             full_path = os.path.join(self.current_dir, filename)
             with open(full_path, 'w') as f:
-                f.write('')
-            logging.info(f"Created file: {filename}")
+                if size:
+                    # Reserve the blocks up front; truncate (sparse) where fallocate isn't supported
+                    try:
+                        os.posix_fallocate(f.fileno(), 0, size)
+                    except (AttributeError, OSError):
+                        f.truncate(size)
+            self._note_changes(full_path)
+            logging.info(f"Created file: {filename}" + (f" ({size} bytes)" if size else ""))
             return True
         except Exception as e:
             logging.error(f"Failed to create {filename}: {str(e)}")
@@ -117,9 +257,11 @@ class FileManager:
                 shutil.copytree(src_path, dest_path)
             else:
                 shutil.copy2(src_path, dest_path)
-            if src_path in self.tags:
-                self.tags[dest_path] = self.tags[src_path]
-                self.save_tags()
+            self._note_changes(dest_path, tree=True)
+            with self.lock:
+                if src_path in self.tags:
+                    self.tags[dest_path] = list(self.tags[src_path])
+                    self.save_tags()
             logging.info(f"Copied {source} to {destination}")
             return True
         except Exception as e:
@@ -141,9 +283,11 @@ class FileManager:
             old_path = os.path.join(self.current_dir, old_name)
             new_path = os.path.join(self.current_dir, new_name)
             os.rename(old_path, new_path)
-            if old_path in self.tags:
-                self.tags[new_path] = self.tags.pop(old_path)
-                self.save_tags()
+            self._note_changes(old_path, new_path)
+            with self.lock:
+                if old_path in self.tags:
+                    self.tags[new_path] = self.tags.pop(old_path)
+                    self.save_tags()
             logging.info(f"Renamed {old_name} to {new_name}")
             return True
         except Exception as e:
@@ -155,9 +299,11 @@ class FileManager:
             src_path = os.path.join(self.current_dir, source)
             dest_path = os.path.abspath(destination)
             shutil.move(src_path, dest_path)
-            if src_path in self.tags:
-                self.tags[dest_path] = self.tags.pop(src_path)
-                self.save_tags()
+            self._note_changes(src_path, dest_path, tree=True)
+            with self.lock:
+                if src_path in self.tags:
+                    self.tags[dest_path] = self.tags.pop(src_path)
+                    self.save_tags()
             logging.info(f"Moved {source} to {destination}")
             return True
         except Exception as e:
@@ -185,18 +331,18 @@ class FileManager:
             logging.error(f"Failed to read {filename}: {str(e)}")
             raise Exception(f"Read failed: {str(e)}")
 
-    def search_files(self, pattern, recursive=False):
+    def search_files(self, pattern, recursive=False, directory=None):
         try:
             matches = []
-            search_dir = self.current_dir
+            search_dir = directory or self.current_dir
             
             if recursive:
-                for root, _, files in os.walk(search_dir):
+                for root, files in self.walk_names(search_dir):
                     for f in files:
                         if pattern.lower() in f.lower():
                             matches.append(os.path.relpath(os.path.join(root, f), search_dir))
             else:
-                for f in os.listdir(search_dir):
+                for f, _ in self.dir_entries(search_dir):
                     if pattern.lower() in f.lower():
                         matches.append(f)
             
@@ -220,17 +366,51 @@ class FileManager:
         try:
             full_path = os.path.join(self.current_dir, filename)
             set_permissions(full_path, perms)
+            self._note_changes(full_path)
             logging.info(f"Set permissions for {filename} to {perms}")
             return True
         except Exception as e:
             logging.error(f"Failed to set permissions for {filename}: {str(e)}")
             raise Exception(f"Permissions set failed: {str(e)}")
 
-    def edit_file(self, filename, content):
+    def set_permissions_recursive(self, directory, perms, only=None):
+        try:
+            top = os.path.normpath(os.path.join(self.current_dir, directory))
+            compute_mode(0, perms)  # reject bad perms before touching anything
+            changed, skipped = [], []  # list.append is safe across the walker threads
+
+            def visit(dir_fd, entry, rel_path, phase):
+                if entry.is_symlink() or (only and not fnmatch.fnmatch(entry.name, only)):
+                    return
+                current = entry.stat(follow_symlinks=False).st_mode
+                mode = compute_mode(current, perms)
+                if phase != "file":
+                    # Directories that gain bits change before we descend (so we can enter them),
+                    # ones that lose bits change after (so we can still reach their contents)
+                    grows = mode & ~current & 0o7777
+                    if (phase == "pre") != bool(grows):
+                        return
+                if mode == current & 0o7777:
+                    skipped.append(rel_path)
+                    return
+                os.chmod(entry.name, mode, dir_fd=dir_fd)
+                changed.append(rel_path)
+
+            errors = walk_tree(top, visit)
+            self._note_changes(top, tree=True)
+            logging.info(f"Set permissions {perms} under {directory}: {len(changed)} changed, {len(skipped)} unchanged")
+            return {"changed": len(changed), "skipped": len(skipped), "errors": errors}
+        except Exception as e:
+            logging.error(f"Failed to set permissions under {directory}: {str(e)}")
+            raise Exception(f"Permissions set failed: {str(e)}")
+
+    def edit_file(self, filename, content, buffered=False):
+        # buffered=True leaves the line in the write buffer pool until flush_writes()
         try:
             full_path = os.path.join(self.current_dir, filename)
-            with open(full_path, 'a') as f:
-                f.write(content + '\n')
+            evicted = self.write_buffers.append(full_path, content + '\n')
+            flushed = [] if buffered else self.write_buffers.flush(full_path)
+            self._note_changes(full_path, *([evicted] if evicted else []), *flushed)
             logging.info(f"Edited file: {filename}")
             return True
         except Exception as e:
@@ -240,11 +420,12 @@ class FileManager:
     def add_tag(self, filename, tag):
         try:
             full_path = os.path.join(self.current_dir, filename)
-            if full_path not in self.tags:
-                self.tags[full_path] = []
-            if tag not in self.tags[full_path]:
-                self.tags[full_path].append(tag)
-                self.save_tags()
+            with self.lock:
+                if full_path not in self.tags:
+                    self.tags[full_path] = []
+                if tag not in self.tags[full_path]:
+                    self.tags[full_path].append(tag)
+                    self.save_tags()
             logging.info(f"Added tag '{tag}' to {filename}")
             return True
         except Exception as e:
@@ -254,17 +435,44 @@ class FileManager:
     def remove_tag(self, filename, tag):
         try:
             full_path = os.path.join(self.current_dir, filename)
-            if full_path in self.tags and tag in self.tags[full_path]:
-                self.tags[full_path].remove(tag)
-                if not self.tags[full_path]:
-                    del self.tags[full_path]
-                self.save_tags()
+            with self.lock:
+                if full_path in self.tags and tag in self.tags[full_path]:
+                    self.tags[full_path].remove(tag)
+                    if not self.tags[full_path]:
+                        del self.tags[full_path]
+                    self.save_tags()
             logging.info(f"Removed tag '{tag}' from {filename}")
             return True
         except Exception as e:
             logging.error(f"Failed to remove tag from {filename}: {str(e)}")
             raise Exception(f"Tag remove failed: {str(e)}")
 
+    def add_tag_recursive(self, directory, tag, only=None):
+        try:
+            top = os.path.normpath(os.path.join(self.current_dir, directory))
+            matches = []
+
+            def visit(dir_fd, entry, rel_path, phase):
+                if phase == "file" and not entry.is_symlink() and (not only or fnmatch.fnmatch(entry.name, only)):
+                    matches.append(rel_path)
+
+            errors = walk_tree(top, visit)
+            # Apply every tag change as one update and one save
+            changed = 0
+            with self.lock:
+                for rel_path in matches:
+                    tags = self.tags.setdefault(os.path.join(top, rel_path), [])
+                    if tag not in tags:
+                        tags.append(tag)
+                        changed += 1
+                if changed:
+                    self.save_tags()
+            logging.info(f"Added tag '{tag}' under {directory}: {changed} changed, {len(matches) - changed} already tagged")
+            return {"changed": changed, "skipped": len(matches) - changed, "errors": errors}
+        except Exception as e:
+            logging.error(f"Failed to add tag under {directory}: {str(e)}")
+            raise Exception(f"Tag add failed: {str(e)}")
+
     def get_tags(self, filename):
         try:
             full_path = os.path.join(self.current_dir, filename)
@@ -275,13 +483,13 @@ class FileManager:
             logging.error(f"Failed to get tags for {filename}: {str(e)}")
             raise Exception(f"Tag get failed: {str(e)}")
 
-    def search_by_tag(self, tag, recursive=False):
+    def search_by_tag(self, tag, recursive=False, directory=None):
         try:
             matches = []
-            search_dir = self.current_dir
+            search_dir = directory or self.current_dir
             
             if recursive:
-                for root, _, files in os.walk(search_dir):
+                for root, files in self.walk_names(search_dir):
                     for f in files:
                         full_path = os.path.join(root, f)
                         if full_path in self.tags and tag in self.tags[full_path]:
@@ -298,10 +506,23 @@ class FileManager:
             logging.error(f"Tag search failed: {str(e)}")
             raise Exception(f"Tag search failed: {str(e)}")
         
-    def compress(self, source, zip_name, progress=False):
+    def compress(self, source, zip_name, progress=False, parallel=False, directory=None):
         try:
-            src_path = os.path.join(self.current_dir, source)
-            zip_path = os.path.join(self.current_dir, zip_name)
+            base_dir = directory or self.current_dir
+            src_path = os.path.join(base_dir, source)
+            fmt = tar_format(zip_name)
+            if fmt:
+                archive_path = os.path.join(base_dir, zip_name)
+                arc_root = os.path.relpath(src_path, base_dir) if os.path.isdir(src_path) else os.path.basename(src_path)
+                sources = walk_sources(src_path, arc_root)
+                if progress:
+                    sources = tqdm(sources, desc=f"Compressing {source}", unit=" files")
+                write_tar(sources, archive_path, fmt, parallel=parallel)
+                self._note_changes(archive_path)
+                logging.info(f"Compressed {source} to {zip_name} ({fmt})")
+                return True
+
+            zip_path = os.path.join(base_dir, zip_name)
             if not zip_path.endswith('.zip'):
                 zip_path += '.zip'
 
@@ -310,60 +531,358 @@ class FileManager:
                     files = [os.path.join(root, f) for root, _, fs in os.walk(src_path) for f in fs]
                     iterator = tqdm(files, desc=f"Compressing {source}") if progress else files
                     for file in iterator:
-                        zf.write(file, os.path.relpath(file, self.current_dir))
+                        zf.write(file, os.path.relpath(file, base_dir))
                 else:
                     zf.write(src_path, os.path.basename(src_path))
+            self._note_changes(zip_path)
 
             logging.info(f"Compressed {source} to {zip_name}")
             return True
         except Exception as e:
             logging.error(f"Failed to compress {source}: {str(e)}")
             raise Exception(f"Compress failed: {str(e)}")
-        
-    def extract(self, zip_name, dest_dir=None, progress=False):
+
+    def extract(self, zip_name, dest_dir=None, progress=False, directory=None):
         try:
-            zip_path = os.path.join(self.current_dir, zip_name)
-            dest_path = os.path.join(self.current_dir, dest_dir) if dest_dir else self.current_dir
-
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                files = zf.namelist()
-                iterator = tqdm(files, desc=f"Extracting {zip_name}") if progress else files
-                for file in iterator:
-                    zf.extract(file, dest_path)
-                
+            base_dir = directory or self.current_dir
+            zip_path = os.path.join(base_dir, zip_name)
+            dest_path = os.path.join(base_dir, dest_dir) if dest_dir else base_dir
+            fmt = detect_format(zip_path)
+
+            if fmt == "zip":
+                with zipfile.ZipFile(zip_path, 'r') as zf:
+                    files = zf.namelist()
+                    iterator = tqdm(files, desc=f"Extracting {zip_name}") if progress else files
+                    for file in iterator:
+                        zf.extract(file, dest_path)
+            elif fmt:
+                members = iter_tar_extract(zip_path, dest_path, fmt)
+                for _ in tqdm(members, desc=f"Extracting {zip_name}", unit=" files") if progress else members:
+                    pass
+            else:
+                raise Exception(f"{zip_name} is not a recognized archive")
+
+            self._note_changes(dest_path, tree=True)
             logging.info(f"Extracted {zip_name} to {dest_path}")
             return True
         except Exception as e:
             logging.error(f"Failed to extract {zip_name}: {str(e)}")
             raise Exception(f"Extract failed: {str(e)}")
-        
-    def extract(self, zip_name, dest_dir=None, progress=False):
+
+    def _open_zip(self, zip_path):
+        # Parsing the central directory of a 100k-member zip takes a while, so keep
+        # recently used archives open and reuse them until the file changes
+        stats = os.stat(zip_path)
+        with self.lock:
+            cached = self.archive_cache.get(zip_path)
+            if cached and cached[0] == stats.st_mtime_ns and cached[1] == stats.st_size:
+                self.archive_cache.move_to_end(zip_path)
+                return cached[2]
+            if cached:
+                cached[2].close()
+            zf = zipfile.ZipFile(zip_path, 'r')
+            self.archive_cache[zip_path] = (stats.st_mtime_ns, stats.st_size, zf)
+            if len(self.archive_cache) > self.archive_cache_size:
+                _, (_, _, oldest) = self.archive_cache.popitem(last=False)
+                oldest.close()
+            return zf
+
+    def list_archive(self, zip_name, pattern=None):
         try:
             zip_path = os.path.join(self.current_dir, zip_name)
-            dest_path = os.path.join(self.current_dir, dest_dir) if dest_dir else self.current_dir
-
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                files = zf.namelist()
-                iterator = tqdm(files, desc=f"Extracting {zip_name}") if progress else files
-                for file in iterator:
-                    zf.extract(file, dest_path)
+            zf = self._open_zip(zip_path)
+            members = [(info.filename, info.file_size, info.compress_size) for info in zf.infolist()
+                       if pattern is None or fnmatch.fnmatch(info.filename, pattern)]
+            logging.info(f"Listed {len(members)} members of {zip_name}")
+            return members
+        except Exception as e:
+            logging.error(f"Failed to list {zip_name}: {str(e)}")
+            raise Exception(f"Archive list failed: {str(e)}")
 
-            logging.info(f"Extracted {zip_name} to {dest_path}")
-            return True
+    def open_archive_member(self, zip_name, member):
+        try:
+            zip_path = os.path.join(self.current_dir, zip_name)
+            stream = self._open_zip(zip_path).open(member, 'r')
+            logging.info(f"Opened {member} in {zip_name}")
+            return stream
         except Exception as e:
-            logging.error(f"Failed to extract {zip_name}: {str(e)}")
-            raise Exception(f"Extract failed: {str(e)}")
-        
+            logging.error(f"Failed to open {member} in {zip_name}: {str(e)}")
+            raise Exception(f"Archive read failed: {str(e)}")
+
+    def file_digest(self, path, algo="sha256"):
+        # Digests are reused until the file's size or mtime changes
+        stats = os.stat(path)
+        key = (path, algo.lower())
+        cached = self.digest_cache.get(key)
+        if cached and cached[0] == stats.st_size and cached[1] == stats.st_mtime_ns:
+            return cached[2]
+        hash_obj = hashlib.sha256() if algo.lower() == "sha256" else hashlib.md5()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hash_obj.update(chunk)
+        digest = hash_obj.hexdigest()
+        self.digest_cache[key] = (stats.st_size, stats.st_mtime_ns, digest)
+        return digest
+
     def hash_file(self, filename, algo="sha256"):
         try:
             full_path = os.path.join(self.current_dir, filename)
-            hash_obj = hashlib.sha256() if algo.lower() == "sha256" else hashlib.md5()
-            with open(full_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_obj.update(chunk)
-            hash_value = hash_obj.hexdigest()
+            hash_value = self.file_digest(full_path, algo)
             logging.info(f"Computed {algo} hash for {filename}: {hash_value}")
             return hash_value
         except Exception as e:
             logging.error(f"Failed to hash {filename}: {str(e)}")
-            raise Exception(f"Hash failed: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Hash failed: {str(e)}")
+
+    def sync_dirs(self, source, destination, delete=False, checksum=False, dry_run=False, progress=False):
+        try:
+            src_path = os.path.join(self.current_dir, source)
+            dest_path = os.path.join(self.current_dir, destination)
+            if not os.path.isdir(src_path):
+                raise Exception(f"{source} is not a directory")
+            plan = plan_sync(src_path, dest_path, delete=delete, checksum=checksum, digest=self.file_digest)
+            summary = {
+                "copies": len(plan["copies"]),
+                "mkdirs": len(plan["mkdirs"]),
+                "deletes": len(plan["deletes"]),
+                "bytes": plan["bytes"]
+            }
+            if dry_run:
+                summary["plan"] = plan
+                logging.info(f"Planned sync {source} -> {destination}: {summary['copies']} files, {plan['bytes']} bytes")
+                return summary
+            bar = tqdm(total=len(plan["copies"]), desc=f"Syncing {source}") if progress and plan["copies"] else None
+            try:
+                summary.update(run_sync(src_path, dest_path, plan, progress=bar))
+            finally:
+                if bar:
+                    bar.close()
+            self._note_changes(dest_path, tree=True)
+            logging.info(f"Synced {source} to {destination}: {summary['copied']} copied ({summary['deltas']} delta), "
+                         f"{summary['written']} bytes written, {summary['deleted']} deleted")
+            return summary
+        except Exception as e:
+            logging.error(f"Failed to sync {source} to {destination}: {str(e)}")
+            raise Exception(f"Sync failed: {str(e)}")
+
+    def watch(self, directory):
+        try:
+            root = os.path.abspath(os.path.join(self.current_dir, directory))
+            if not os.path.isdir(root):
+                raise Exception(f"{directory} is not a directory")
+            if root in self.watchers:
+                return self.watchers[root].mode
+            with self.lock:
+                self._prime_dir_cache(root)
+            watcher = DirectoryWatcher(root, self.apply_fs_events)
+            mode = watcher.start()
+            self.watchers[root] = watcher
+            logging.info(f"Watching {root} ({mode})")
+            return mode
+        except Exception as e:
+            logging.error(f"Failed to watch {directory}: {str(e)}")
+            raise Exception(f"Watch failed: {str(e)}")
+
+    def unwatch(self, directory):
+        try:
+            root = os.path.abspath(os.path.join(self.current_dir, directory))
+            watcher = self.watchers.pop(root, None)
+            if watcher is None:
+                raise Exception(f"{directory} is not being watched")
+            watcher.stop()
+            with self.lock:
+                self._drop_dir_cache(root)
+                for other in self.watchers:
+                    if root.startswith(other + os.sep) or other.startswith(root + os.sep):
+                        self._prime_dir_cache(max(root, other, key=len))
+            logging.info(f"Stopped watching {root}")
+            return True
+        except Exception as e:
+            logging.error(f"Failed to unwatch {directory}: {str(e)}")
+            raise Exception(f"Unwatch failed: {str(e)}")
+
+    def flush_writes(self):
+        try:
+            self._note_changes(*self.write_buffers.flush())
+        except Exception as e:
+            logging.error(f"Failed to flush buffered edits: {str(e)}")
+            raise Exception(f"Write flush failed: {str(e)}")
+
+    def close(self):
+        self.write_buffers.close()
+        for watcher in self.watchers.values():
+            watcher.stop()
+        self.watchers = {}
+        for _, _, zf in self.archive_cache.values():
+            zf.close()
+        self.archive_cache.clear()
+
+    def _prime_dir_cache(self, top):
+        for root, dirs, files in os.walk(top):
+            entries = {}
+            for name in dirs + files:
+                try:
+                    entries[name] = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+            self.dir_cache[root] = entries
+
+    def _drop_dir_cache(self, top):
+        prefix = top + os.sep
+        for root in [r for r in self.dir_cache if r == top or r.startswith(prefix)]:
+            del self.dir_cache[root]
+            self.fuzzy_cache.pop(root, None)
+
+    def _note_changes(self, *paths, tree=False):
+        # Apply our own changes to the watch cache before returning, rather than when
+        # the watcher reports them; tree=True re-reads everything below a directory
+        if not self.watchers:
+            return
+        with self.lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                was_cached = path in self.dir_cache
+                self._refresh_path(path)
+                if tree and was_cached and os.path.isdir(path):
+                    self._drop_dir_cache(path)
+                    self._prime_dir_cache(path)
+
+    def _refresh_path(self, path):
+        parent = self.dir_cache.get(os.path.dirname(path))
+        name = os.path.basename(path)
+        fuzzy = self.fuzzy_cache.get(os.path.dirname(path))
+        if fuzzy is not None and fuzzy[0] is not None:
+            fuzzy = None  # not built from the watch cache; its mtime check catches the change
+        try:
+            st = os.stat(path)
+        except OSError:
+            if parent is not None:
+                parent.pop(name, None)
+            if fuzzy is not None:
+                fuzzy[1].update(removed=[name])
+                fuzzy[2].discard(name)
+            self._drop_dir_cache(path)
+            return
+        if parent is not None:
+            parent[name] = st
+        if fuzzy is not None:
+            fuzzy[1].update(added=[name])
+            if stat.S_ISDIR(st.st_mode):
+                fuzzy[2].add(name)
+            else:
+                fuzzy[2].discard(name)
+        if stat.S_ISDIR(st.st_mode) and path not in self.dir_cache and parent is not None:
+            self._prime_dir_cache(path)
+
+    def _move_tags(self, src, dest):
+        prefix = src + os.sep
+        moved = [key for key in self.tags if key == src or key.startswith(prefix)]
+        for key in moved:
+            self.tags[dest + key[len(src):]] = self.tags.pop(key)
+        return bool(moved)
+
+    def apply_fs_events(self, events):
+        # Called from watcher threads with coalesced batches of outside changes
+        with self.lock:
+            tags_changed = False
+            for kind, path, dest in events:
+                if kind == "rescan":
+                    self._drop_dir_cache(path)
+                    self._prime_dir_cache(path)
+                elif kind == "moved":
+                    tags_changed |= self._move_tags(path, dest)
+                    self._drop_dir_cache(path)
+                    self._refresh_path(path)
+                    self._refresh_path(dest)
+                else:
+                    self._refresh_path(path)
+            if tags_changed:
+                self.save_tags()
+        logging.debug(f"Applied {len(events)} filesystem events")
+
+    def create_manifest(self, directory, manifest_name, digests=False):
+        try:
+            top = os.path.join(self.current_dir, directory)
+            out_path = os.path.join(self.current_dir, manifest_name)
+            if not os.path.isdir(top):
+                raise Exception(f"{directory} is not a directory")
+            count, computed = write_manifest(top, out_path, digest=self.file_digest if digests else None, previous=out_path)
+            self._note_changes(out_path)
+            logging.info(f"Wrote manifest of {directory} to {manifest_name}: {count} entries, {computed} digests computed")
+            return count
+        except Exception as e:
+            logging.error(f"Failed to write manifest of {directory}: {str(e)}")
+            raise Exception(f"Manifest failed: {str(e)}")
+
+    def _manifest_source(self, name):
+        # A directory is scanned live (digests computed on demand); anything else is read as a manifest
+        path = os.path.join(self.current_dir, name)
+        if os.path.isdir(path):
+            return scan_tree(path), lambda rel: self.file_digest(os.path.join(path, rel))
+        return read_manifest(path), None
+
+    def diff_trees(self, left, right):
+        try:
+            left_entries, left_digest = self._manifest_source(left)
+            right_entries, right_digest = self._manifest_source(right)
+            result = diff_entries(left_entries, right_entries, left_digest, right_digest)
+            logging.info(f"Diffed {left} and {right}: {len(result['added'])} added, {len(result['removed'])} removed, "
+                         f"{len(result['modified'])} modified, {len(result['renamed'])} renamed")
+            return result
+        except Exception as e:
+            logging.error(f"Failed to diff {left} and {right}: {str(e)}")
+            raise Exception(f"Diff failed: {str(e)}")
+
+    def backup(self, directory, store, progress=False):
+        try:
+            src_path = os.path.join(self.current_dir, directory)
+            store_path = os.path.join(self.current_dir, store)
+            if not os.path.isdir(src_path):
+                raise Exception(f"{directory} is not a directory")
+            bar = tqdm(desc=f"Backing up {directory}", unit=" files") if progress else None
+            try:
+                name, stats = create_snapshot(src_path, store_path, progress=bar)
+            finally:
+                if bar is not None:
+                    bar.close()
+            self._note_changes(store_path, tree=True)
+            logging.info(f"Backed up {directory} to {store} as {name}: {stats['changed']} of {stats['files']} files changed, "
+                         f"{stats['new_chunks']} new chunks ({stats['written']} bytes)")
+            return name, stats
+        except Exception as e:
+            logging.error(f"Failed to back up {directory}: {str(e)}")
+            raise Exception(f"Backup failed: {str(e)}")
+
+    def restore(self, store, snapshot, destination, progress=False):
+        try:
+            store_path = os.path.join(self.current_dir, store)
+            dest_path = os.path.join(self.current_dir, destination)
+            bar = tqdm(desc=f"Restoring {snapshot}", unit=" files") if progress else None
+            try:
+                count = restore_snapshot(store_path, snapshot, dest_path, progress=bar)
+            finally:
+                if bar is not None:
+                    bar.close()
+            self._note_changes(dest_path, tree=True)
+            logging.info(f"Restored {snapshot} from {store} to {destination}: {count} files")
+            return count
+        except Exception as e:
+            logging.error(f"Failed to restore {snapshot}: {str(e)}")
+            raise Exception(f"Restore failed: {str(e)}")
+
+    def list_snapshots(self, store):
+        try:
+            return snapshot_names(os.path.join(self.current_dir, store))
+        except Exception as e:
+            logging.error(f"Failed to list snapshots in {store}: {str(e)}")
+            raise Exception(f"Snapshot list failed: {str(e)}")
+
+    def backup_gc(self, store):
+        try:
+            removed, freed = collect_garbage(os.path.join(self.current_dir, store))
+            self._note_changes(os.path.join(self.current_dir, store), tree=True)
+            logging.info(f"Garbage collected {store}: {removed} chunks, {freed} bytes")
+            return removed, freed
+        except Exception as e:
+            logging.error(f"Failed to garbage collect {store}: {str(e)}")
+            raise Exception(f"Backup gc failed: {str(e)}")
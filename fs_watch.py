@@ -0,0 +1,251 @@
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+import time
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+class WatchLimitError(Exception):
+    pass
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+_libc = _load_libc()
+
+class DirectoryWatcher:
+    """Watches a directory tree and reports coalesced batches of changes.
+
+    The callback receives a list of events: ("moved", src, dest), ("changed", path, None)
+    or ("rescan", root, None). Uses inotify when available and falls back to
+    periodic mtime polling when it is not, or when the kernel's watch limit
+    (fs.inotify.max_user_watches) runs out.
+    """
+
+    def __init__(self, root, callback, coalesce=0.2, poll_interval=2.0):
+        self.root = os.path.abspath(root)
+        self.callback = callback
+        self.coalesce = coalesce
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._fd = None
+        self._wd_paths = {}
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = None
+        self._snapshot = None
+
+    def start(self):
+        try:
+            self._start_inotify()
+            self.mode = "inotify"
+        except WatchLimitError as e:
+            logging.warning(f"Falling back to polling for {self.root}: {str(e)}")
+            self._close_inotify()
+            self.mode = "polling"
+        self._thread = threading.Thread(target=self._run, name=f"fyle-watch:{self.root}", daemon=True)
+        self._thread.start()
+        return self.mode
+
+    def stop(self):
+        os.write(self._stop_w, b"x")
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._close_inotify()
+        os.close(self._stop_r)
+        os.close(self._stop_w)
+
+    def _start_inotify(self):
+        if _libc is None:
+            raise WatchLimitError("inotify is not available on this platform")
+        fd = _libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            raise WatchLimitError(os.strerror(ctypes.get_errno()))
+        self._fd = fd
+        self._add_tree(self.root)
+
+    def _close_inotify(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._wd_paths = {}
+
+    def _add_watch(self, path):
+        wd = _libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOSPC, errno.ENOMEM):
+                raise WatchLimitError(f"inotify watch limit reached at {path}")
+            if err not in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                logging.warning(f"Cannot watch {path}: {os.strerror(err)}")
+            return
+        self._wd_paths[wd] = path
+
+    def _add_tree(self, top):
+        for root, dirs, _ in os.walk(top):
+            self._add_watch(root)
+
+    def _run(self):
+        try:
+            if self.mode == "inotify":
+                self._run_inotify()
+            if self.mode == "polling":
+                self._run_polling()
+        except Exception as e:
+            logging.error(f"Watcher for {self.root} stopped: {str(e)}")
+
+    def _wait(self, timeout):
+        # Returns (stop requested, inotify fd readable)
+        fds = [self._stop_r] + ([self._fd] if self._fd is not None else [])
+        ready, _, _ = select.select(fds, [], [], timeout)
+        return self._stop_r in ready, self._fd is not None and self._fd in ready
+
+    def _run_inotify(self):
+        while True:
+            stopped, readable = self._wait(None)
+            if stopped:
+                return
+            # Let the burst settle, then drain everything that arrived in the window
+            pending = []
+            deadline = time.monotonic() + self.coalesce
+            while readable:
+                pending.append(os.read(self._fd, 64 * 1024))
+                stopped, readable = self._wait(max(0, deadline - time.monotonic()))
+                if stopped:
+                    return
+            try:
+                events = self._parse(b"".join(pending))
+            except WatchLimitError as e:
+                logging.warning(f"Falling back to polling for {self.root}: {str(e)}")
+                self._close_inotify()
+                self.mode = "polling"
+                self._dispatch([("rescan", self.root, None)])
+                return
+            self._dispatch(events)
+
+    def _parse(self, data):
+        moves = []
+        changed = {}
+        cookies = {}
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Kernel dropped events; only a full rescan is trustworthy
+                self._wd_paths = {}
+                self._add_tree(self.root)
+                return [("rescan", self.root, None)]
+            base = self._wd_paths.get(wd)
+            if base is None:
+                continue
+            if mask & IN_IGNORED:
+                self._wd_paths.pop(wd, None)
+                continue
+            path = os.path.join(base, name) if name else base
+            if mask & IN_MOVED_FROM:
+                cookies[cookie] = path
+                changed[path] = None
+            elif mask & IN_MOVED_TO:
+                src = cookies.pop(cookie, None)
+                if src is not None:
+                    moves.append(("moved", src, path))
+                    self._rebase_watches(src, path)
+                elif mask & IN_ISDIR:
+                    self._add_tree(path)
+                changed[path] = None
+            else:
+                if mask & IN_CREATE and mask & IN_ISDIR:
+                    self._add_tree(path)
+                changed[path] = None
+        for src in cookies.values():
+            # Moved out of the tree: its old watches now point somewhere we can't name
+            self._drop_watches(src)
+        return moves + [("changed", path, None) for path in changed]
+
+    def _drop_watches(self, top):
+        prefix = top + os.sep
+        for wd, path in list(self._wd_paths.items()):
+            if path == top or path.startswith(prefix):
+                _libc.inotify_rm_watch(self._fd, wd)
+                del self._wd_paths[wd]
+
+    def _rebase_watches(self, src, dest):
+        prefix = src + os.sep
+        for wd, path in self._wd_paths.items():
+            if path == src or path.startswith(prefix):
+                self._wd_paths[wd] = dest + path[len(src):]
+
+    def _scan(self):
+        snapshot = {}
+        for root, dirs, files in os.walk(self.root):
+            for name in dirs + files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.lstat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+        return snapshot
+
+    def _run_polling(self):
+        self._snapshot = self._scan()
+        while True:
+            stopped, _ = self._wait(self.poll_interval)
+            if stopped:
+                return
+            snapshot = self._scan()
+            previous = self._snapshot
+            self._snapshot = snapshot
+            removed = {path: info for path, info in previous.items() if path not in snapshot}
+            added = {path: info for path, info in snapshot.items() if path not in previous}
+            events = []
+            by_inode = {info[2]: path for path, info in removed.items()}
+            for path, info in added.items():
+                src = by_inode.pop(info[2], None)
+                if src is not None and os.path.dirname(src) not in removed:
+                    events.append(("moved", src, path))
+            events.extend(("changed", path, None) for path in list(removed) + list(added))
+            events.extend(("changed", path, None) for path, info in snapshot.items()
+                          if path in previous and previous[path] != info)
+            if events:
+                self._dispatch(events)
+
+    def _dispatch(self, events):
+        try:
+            self.callback(events)
+        except Exception as e:
+            logging.error(f"Watch callback failed for {self.root}: {str(e)}")
@@ -0,0 +1,210 @@
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+# Match tiers, best first
+EXACT, NOCASE, PREFIX, ABBREV, SIMILAR = range(5)
+SIMILAR_SCAN = 128  # up to this many names, typo lookups compare every one (as difflib.get_close_matches)
+SIMILAR_BUDGET = 2048  # postings counted when gathering typo candidates
+SIMILAR_CANDIDATES = 32  # candidates ranked by n-gram overlap
+SIMILAR_RATIOS = 6  # best-overlapping candidates given the full difflib ratio
+MAX_REPEAT = 4  # repeats of a character tracked by the abbreviation index
+ABBREV_SCAN = 2048  # candidates checked per abbreviation lookup
+ABBREV_MATCHES = 64  # matches collected before ranking
+MAX_DEAD = 0.25  # fraction of removed names tolerated before update() rebuilds
+
+def _ngrams(text, n):
+    padded = f"^{text}$"
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+class FuzzyIndex:
+    """Precomputed index for fuzzy lookups over a set of names.
+
+    Lookups try, in order: exact, case-insensitive, prefix (bisect on the
+    sorted names), abbreviation (the query's characters appear in order and
+    the first one starts the name, e.g. "prjrep" -> "project_reports") and
+    n-gram similarity for typos, and answer from the first tier that matches.
+
+    Only the exact and prefix structures are built up front. The abbreviation
+    postings (later character and how often it occurs -> names) are built per
+    first character, from that character's range of the sorted names, and
+    the n-gram postings once for all names, the first time a lookup needs
+    them. Every tier checks a bounded number of candidates, so lookup cost
+    does not grow with the number of names. update() applies added and
+    removed names in place instead of rebuilding.
+    """
+
+    def __init__(self, names, n=3):
+        self.n = n
+        self.names = list(names)
+        self.lowered = [name.lower() for name in self.names]
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.dead = set()
+        self.exact = {}
+        for i, name in enumerate(self.lowered):
+            self.exact.setdefault(name, []).append(i)
+        self.order = sorted(range(len(self.names)), key=self.lowered.__getitem__)
+        self.sorted_keys = [self.lowered[i] for i in self.order]
+        self._chars = {}  # first char -> {c * k: ids holding c at least k times after it}
+        self._grams = None  # n-gram -> ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def update(self, added=(), removed=()):
+        removed = [name for name in removed if name in self.ids]
+        if (len(self.dead) + len(removed)) > MAX_DEAD * (len(self.ids) + len(added)):
+            live = set(self.ids).difference(removed)
+            live.update(added)
+            self.__init__(live, self.n)
+            return
+        for name in removed:
+            i = self.ids.pop(name)
+            self.dead.add(i)
+            lowered = self.lowered[i]
+            self.exact[lowered].remove(i)
+            k = bisect_left(self.sorted_keys, lowered)
+            while self.order[k] != i:
+                k += 1
+            del self.order[k], self.sorted_keys[k]
+        for name in added:
+            if name in self.ids:
+                continue
+            i = len(self.names)
+            lowered = name.lower()
+            self.names.append(name)
+            self.lowered.append(lowered)
+            self.ids[name] = i
+            self.exact.setdefault(lowered, []).append(i)
+            k = bisect_right(self.sorted_keys, lowered)
+            self.order.insert(k, i)
+            self.sorted_keys.insert(k, lowered)
+            if lowered and lowered[0] in self._chars:
+                self._post_chars(self._chars[lowered[0]], i, lowered)
+            if self._grams is not None:
+                self._post_grams(self._grams, i, lowered)
+
+    def _prefix(self, query):
+        lo = bisect_left(self.sorted_keys, query)
+        hi = bisect_right(self.sorted_keys, query + "\uffff")
+        return (self.order[k] for k in range(lo, hi))
+
+    def _initial_ids(self, initial):
+        # Live names starting with initial, shortest first so bounded scans see the likeliest matches
+        ids = list(self._prefix(initial))
+        ids.sort(key=lambda i: len(self.lowered[i]))
+        return ids
+
+    def _post_chars(self, postings, i, name):
+        rest = name[1:]
+        for c in set(rest):
+            postings[c].append(i)
+            repeats = rest.count(c)
+            if repeats > 1:
+                for k in range(2, min(repeats, MAX_REPEAT) + 1):
+                    postings[c * k].append(i)
+
+    def _post_grams(self, postings, i, name):
+        for gram in _ngrams(name, self.n):
+            postings[gram].append(i)
+
+    def _abbreviations(self, query):
+        if len(query) < 2:
+            return []  # a single character is a prefix, answered by the tier above
+        postings = self._chars.get(query[0])
+        if postings is None:
+            postings = self._chars[query[0]] = defaultdict(list)
+            for i in self._initial_ids(query[0]):
+                self._post_chars(postings, i, self.lowered[i])
+        # Every match holds each later query character at least as often as the query does,
+        # so the shortest of those posting lists bounds the candidates
+        candidates = min((postings.get(c * min(k, MAX_REPEAT), ()) for c, k in Counter(query[1:]).items()), key=len)
+        # "[^c]*c" takes the leftmost c, so a name that can't match fails without backtracking
+        pattern = re.compile(re.escape(query[0]) + "".join(f"[^{re.escape(c)}]*{re.escape(c)}" for c in query[1:]))
+        matches = []
+        for i in candidates[:ABBREV_SCAN]:
+            m = pattern.match(self.lowered[i])
+            if m and i not in self.dead:
+                # Tighter matches first, then shorter names
+                matches.append((m.end(), len(self.lowered[i]), i))
+                if len(matches) >= ABBREV_MATCHES:
+                    break
+        return [i for _, _, i in sorted(matches)]
+
+    def _similar(self, query, cutoff):
+        if len(self.ids) <= SIMILAR_SCAN:
+            candidates = self.order
+        else:
+            candidates = self._similar_candidates(query)
+        scored = []
+        matcher = SequenceMatcher(None, b=query)
+        for i in candidates:
+            matcher.set_seq1(self.lowered[i])
+            if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= cutoff:
+                scored.append((-ratio, len(self.lowered[i]), i))
+        return [i for _, _, i in sorted(scored)]
+
+    def _similar_candidates(self, query):
+        if self._grams is None:
+            self._grams = defaultdict(list)
+            for i, name in enumerate(self.lowered):
+                if i not in self.dead:
+                    self._post_grams(self._grams, i, name)
+        # Count the query's rarest n-grams, up to a posting budget: a typo only breaks
+        # the n-grams around it, and common ones say little
+        grams = _ngrams(query, self.n)
+        postings = sorted((self._grams[gram] for gram in grams if gram in self._grams), key=len)
+        counts = Counter()
+        budget = SIMILAR_BUDGET
+        for ids in postings:
+            if len(ids) > budget and counts:
+                break
+            counts.update(ids[:budget])
+            budget -= len(ids)
+        for i in self.dead.intersection(counts):
+            del counts[i]
+        # Rank the best-counted by overlap with all of the query's n-grams (Dice), which is
+        # cheap next to SequenceMatcher.ratio(), and only give the ratio to the best few
+        overlaps = []
+        for i, _ in counts.most_common(SIMILAR_CANDIDATES):
+            name_grams = _ngrams(self.lowered[i], self.n)
+            overlaps.append((-len(grams & name_grams) / (len(grams) + len(name_grams)), i))
+        overlaps.sort()
+        return [i for _, i in overlaps[:SIMILAR_RATIOS]]
+
+    def match(self, query, limit=3, accept=None, cutoff=0.6):
+        """Return up to limit (name, tier) pairs from the best tier with any match.
+
+        accept, if given, is a predicate on names that filters candidates.
+        """
+        lowered = query.lower()
+        if not lowered:
+            return []
+        tiers = (
+            (EXACT, lambda: (i for i in self.exact.get(lowered, ()) if self.names[i] == query)),
+            (NOCASE, lambda: self.exact.get(lowered, ())),
+            (PREFIX, lambda: self._prefix(lowered)),
+            (ABBREV, lambda: self._abbreviations(lowered)),
+            (SIMILAR, lambda: self._similar(lowered, cutoff)),
+        )
+        for tier, candidates in tiers:
+            results = []
+            for i in candidates():
+                if accept and not accept(self.names[i]):
+                    continue
+                results.append((self.names[i], tier))
+                if len(results) >= limit:
+                    break
+            if results:
+                return results
+        return []
+
+    def suggest(self, query, limit=3):
+        return [name for name, _ in self.match(query, limit)]
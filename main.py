@@ -1,11 +1,31 @@
-import logging
-import json
-from colorama import init as colorama_init
-from cli_interface import CLIInterface
-from file_manager import FileManager
-from utils import load_config, validate_config, setup_logging, load_variables, save_variables
+import sys
+import argparse
+from daemon_client import run_client
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fyle file manager CLI")
+    parser.add_argument("--serve", metavar="SOCKET", help="run as a daemon serving FileManager on a Unix socket")
+    parser.add_argument("--connect", metavar="SOCKET", help="forward a single command to a running daemon")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="command to send with --connect")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    if args.connect:
+        if not args.command:
+            print("Error: --connect needs a command to forward", file=sys.stderr)
+            sys.exit(2)
+        sys.exit(run_client(args.connect, args.command))
+
+    # Imported here so --connect doesn't pay for prompt_toolkit and friends
+    import logging
+    import asyncio
+    from colorama import init as colorama_init
+    from cli_interface import CLIInterface
+    from file_manager import FileManager
+    from daemon import FyleDaemon
+    from utils import load_config, validate_config, setup_logging, load_variables, save_variables
+
     colorama_init()
 
     try:
@@ -19,6 +39,8 @@ def main():
             "version": "0.15",
             "prompt": "FyleCLI> ",
             "max_history": 100,
+            "history_file": "history.txt",
+            "atomic_edits": False,
             "search_recursive": False,
             "default_sort": "name",
             "min_size": 0,
@@ -44,10 +66,25 @@ def main():
     setup_logging('logs/cli.log', config["log_level"])
 
     file_manager = FileManager()
+    file_manager.write_buffers.atomic = config["atomic_edits"]
     cli = CLIInterface(file_manager, config)
     cli.variables = load_variables(config["variables_file"])  # Load persistent variables
-    cli.run()
+    exit_code = 0
+    if args.serve:
+        try:
+            asyncio.run(FyleDaemon(cli, args.serve).serve())
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            logging.error(f"Daemon failed: {str(e)}")
+            print(f"Error: {str(e)}", file=sys.stderr)
+            exit_code = 1
+    else:
+        cli.run()
+    cli.history.close()
+    file_manager.close()
     save_variables(config["variables_file"], cli.variables)  # Save variables on exit
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()      
\ No newline at end of file
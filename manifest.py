@@ -0,0 +1,136 @@
+import os
+import logging
+
+MANIFEST_HEADER = "#fyle-manifest 1"
+_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n"}
+_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n"}
+
+# Entries are (path, size, mtime_ns, mode, digest). Paths use "/" and are ordered
+# component by component, which is the order a depth-first walk with sorted
+# children produces, so trees and manifests can be merge-joined in one pass.
+
+def _key(path):
+    return path.split("/")
+
+def _escape(path):
+    return "".join(_ESCAPES.get(c, c) for c in path) if any(c in path for c in _ESCAPES) else path
+
+def _unescape(text):
+    if "\\" not in text:
+        return text
+    out, chars = [], iter(text)
+    for c in chars:
+        out.append(_UNESCAPES.get(next(chars, ""), "") if c == "\\" else c)
+    return "".join(out)
+
+def scan_tree(top, rel=""):
+    # Yields (path, size, mtime_ns, mode, None) for every non-directory under top, in manifest order
+    with os.scandir(os.path.join(top, rel) if rel else top) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        path = f"{rel}/{entry.name}" if rel else entry.name
+        if entry.is_dir(follow_symlinks=False):
+            yield from scan_tree(top, path)
+        else:
+            st = entry.stat(follow_symlinks=False)
+            yield path, st.st_size, st.st_mtime_ns, st.st_mode, None
+
+def read_manifest(manifest_path):
+    with open(manifest_path, 'r', encoding="utf-8") as f:
+        header = f.readline().rstrip("\n")
+        if header != MANIFEST_HEADER:
+            raise Exception(f"{manifest_path} is not a Fyle manifest")
+        for line in f:
+            path, size, mtime_ns, mode, digest = line.rstrip("\n").split("\t")
+            yield _unescape(path), int(size), int(mtime_ns), int(mode, 8), None if digest == "-" else digest
+
+def merge_join(left, right):
+    # Yields (left_entry or None, right_entry or None) pairs matched by path
+    a, b = next(left, None), next(right, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and _key(a[0]) < _key(b[0])):
+            yield a, None
+            a = next(left, None)
+        elif a is None or _key(b[0]) < _key(a[0]):
+            yield None, b
+            b = next(right, None)
+        else:
+            yield a, b
+            a, b = next(left, None), next(right, None)
+
+def write_manifest(top, out_path, digest=None, previous=None):
+    """Write the manifest of top to out_path; returns (entries, digests computed).
+
+    With digest (a path -> hex callable) every file gets a digest, reusing
+    the one recorded in the previous manifest when size and mtime are
+    unchanged. The file is written to a temporary name first, so previous
+    may be the manifest being replaced.
+    """
+    old = read_manifest(previous) if previous and os.path.exists(previous) else iter(())
+    tmp_path = f"{out_path}.tmp"
+    count = computed = 0
+    with open(tmp_path, 'w', encoding="utf-8") as f:
+        f.write(MANIFEST_HEADER + "\n")
+        for entry, prior in merge_join(scan_tree(top), old):
+            if entry is None:
+                continue
+            path, size, mtime_ns, mode, value = entry
+            if digest is not None:
+                if prior and prior[4] and prior[1] == size and prior[2] == mtime_ns:
+                    value = prior[4]
+                elif mode & 0o170000 == 0o100000:  # regular files only
+                    value = digest(os.path.join(top, path))
+                    computed += 1
+            f.write(f"{_escape(path)}\t{size}\t{mtime_ns}\t{mode:o}\t{value or '-'}\n")
+            count += 1
+    os.replace(tmp_path, out_path)
+    return count, computed
+
+def diff_entries(left, right, left_digest=None, right_digest=None):
+    """Compare two ordered entry streams.
+
+    Returns {"added", "removed", "modified", "renamed"}. Matching paths are
+    compared in a single merge pass; only added and removed entries are kept
+    in memory, to pair them into renames by digest. left_digest/right_digest
+    compute a missing digest for a path on that side (used for directories).
+    """
+    added, removed, modified = [], [], []
+    for a, b in merge_join(left, right):
+        if b is None:
+            removed.append(a)
+        elif a is None:
+            added.append(b)
+        elif a[1] != b[1] or a[3] != b[3]:
+            modified.append(a[0])
+        elif a[2] != b[2]:
+            # Same size, new mtime: trust digests when both sides have (or can get) them
+            da = a[4] or (left_digest(a[0]) if left_digest else None)
+            db = b[4] or (right_digest(b[0]) if right_digest else None)
+            if da is None or db is None or da != db:
+                modified.append(a[0])
+
+    renamed = []
+    if added and removed:
+        by_digest = {}
+        for entry in removed:
+            value = entry[4] or (left_digest(entry[0]) if left_digest else None)
+            if value:
+                by_digest.setdefault(value, []).append(entry)
+        still_added = []
+        for entry in added:
+            value = entry[4] or (right_digest(entry[0]) if right_digest else None)
+            candidates = by_digest.get(value) if value else None
+            if candidates:
+                renamed.append((candidates.pop(0)[0], entry[0]))
+            else:
+                still_added.append(entry)
+        moved = {old for old, _ in renamed}
+        removed = [entry for entry in removed if entry[0] not in moved]
+        added = still_added
+    logging.debug(f"Manifest diff: +{len(added)} -{len(removed)} ~{len(modified)} >{len(renamed)}")
+    return {
+        "added": [entry[0] for entry in added],
+        "removed": [entry[0] for entry in removed],
+        "modified": modified,
+        "renamed": renamed
+    }
@@ -3,17 +3,122 @@ import json
 from datetime import datetime
 import logging
 import stat
-from difflib import get_close_matches
+from array import array
+from itertools import compress
+
+class FileEntry:
+    """One listing row: raw integers only, formatted when printed.
+
+    Also answers the same keys as get_file_info's dict ("name", "size",
+    "modified", "is_dir"), so code written against that dict keeps working.
+    """
+    __slots__ = ("name", "size", "mtime_ns", "mode")
+
+    def __init__(self, name, size, mtime_ns, mode):
+        self.name = name
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.mode = mode
+
+    @classmethod
+    def from_stat(cls, name, stats):
+        return cls(name, stats.st_size, stats.st_mtime_ns, stats.st_mode)
+
+    @property
+    def is_dir(self):
+        return stat.S_ISDIR(self.mode)
+
+    def format_size(self):
+        return f"{self.size} bytes"
+
+    def format_mtime(self):
+        return datetime.fromtimestamp(self.mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M:%S")
+
+    def __getitem__(self, key):
+        if key == "name":
+            return self.name
+        if key == "size":
+            return self.format_size()
+        if key == "modified":
+            return self.format_mtime()
+        if key == "is_dir":
+            return self.is_dir
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return {key: self[key] for key in ("name", "size", "modified", "is_dir")}
+
+    def __str__(self):
+        return f"{self.name}\t{self.format_size()}\t{self.format_mtime()}"
+
+    def __repr__(self):
+        return f"FileEntry({self.name!r}, size={self.size}, mtime_ns={self.mtime_ns}, mode={oct(self.mode)})"
+
+class FileEntryBatch:
+    """Column-oriented listing: names in a list, sizes/mtimes/modes in arrays.
+
+    Costs a few machine words per entry instead of an object each, and lets
+    filters and sorts run over the raw columns.
+    """
+    __slots__ = ("names", "sizes", "mtimes", "modes")
+
+    def __init__(self):
+        self.names = []
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self.modes = array('L')
+
+    @classmethod
+    def from_stats(cls, entries):
+        batch = cls()
+        for name, stats in entries:
+            batch.append(name, stats)
+        return batch
+
+    def append(self, name, stats):
+        self.names.append(name)
+        self.sizes.append(stats.st_size)
+        self.mtimes.append(stats.st_mtime_ns)
+        self.modes.append(stats.st_mode)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        return FileEntry(self.names[index], self.sizes[index], self.mtimes[index], self.modes[index])
+
+    def __iter__(self):
+        return map(FileEntry, self.names, self.sizes, self.mtimes, self.modes)
+
+    def take(self, indices):
+        batch = FileEntryBatch()
+        batch.names = [self.names[i] for i in indices]
+        batch.sizes = array('q', (self.sizes[i] for i in indices))
+        batch.mtimes = array('q', (self.mtimes[i] for i in indices))
+        batch.modes = array('L', (self.modes[i] for i in indices))
+        return batch
+
+    def filter_size(self, min_size=0, max_size=None):
+        upper = float('inf') if max_size is None else max_size
+        keep = [min_size <= size <= upper for size in self.sizes]
+        return self.take(list(compress(range(len(self)), keep)))
+
+    def order(self, sort_by="name", reverse=False):
+        column = {"size": self.sizes, "mtime": self.mtimes}.get(sort_by, self.names)
+        return sorted(range(len(self)), key=column.__getitem__, reverse=reverse)
+
+def get_file_entry(path):
+    return FileEntry.from_stat(os.path.basename(path), os.stat(path))
 
 def get_file_info(path):
     try:
-        stats = os.stat(path)
-        return {
-            "name": os.path.basename(path),
-            "size": f"{stats.st_size} bytes",
-            "modified": datetime.fromtimestamp(stats.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
-            "is_dir": os.path.isdir(path)
-        }
+        return get_file_entry(path).to_dict()
     except Exception as e:
         logging.error(f"Failed to get file info for {path}: {str(e)}")
         return {"name": os.path.basename(path), "error": str(e)}
@@ -34,6 +139,9 @@ def load_config(config_file):
         raise Exception(f"Failed to load configuration: {str(e)}")
 
 def validate_config(config):
+    # Keys added after the first release get defaults, so older config files keep working
+    config.setdefault("history_file", "history.txt")
+    config.setdefault("atomic_edits", False)
     required = {"version", "prompt", "max_history", "search_recursive", "default_sort", 
                 "min_size", "max_size", "aliases", "autocomplete", "log_level", 
                 "batch_enabled", "tags_enabled", "script_dir", "completion_enabled",
@@ -41,12 +149,14 @@ def validate_config(config):
     missing = required - set(config.keys())
     if missing:
         raise Exception(f"Missing config keys: {missing}")
-    if config["default_sort"] not in ["name", "mtime"]:
+    if config["default_sort"] not in ["name", "mtime", "size", "ext", "none"]:
         raise Exception(f"Invalid default_sort value: {config['default_sort']}")
     if not isinstance(config["min_size"], (int, str)) or (isinstance(config["min_size"], str) and not config["min_size"].isdigit()):
         raise Exception(f"Invalid min_size value: {config['min_size']}")
     if config["max_size"] is not None and not isinstance(config["max_size"], (int, str)) or (isinstance(config["max_size"], str) and not config["min_size"].isdigit()):
         raise Exception(f"Invalid max_size value: {config['max_size']}")
+    if not isinstance(config["atomic_edits"], bool):
+        raise Exception(f"Invalid atomic_edits value: {config['atomic_edits']}")
     if not isinstance(config["autocomplete"], bool):
         raise Exception(f"Invalid autocomplete value: {config['autocomplete']}")
     if config["log_level"] not in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]:
@@ -67,6 +177,10 @@ def validate_config(config):
         raise Exception(f"Invalid variables_enabled value: {config['variables_enables']}")
     if not isinstance(config["variables_file"], str):
         raise Exception(f"Invalid variables_file value: {config['variables_file']}")
+    if not isinstance(config["max_history"], int) or config["max_history"] < 1:
+        raise Exception(f"Invalid max_history value: {config['max_history']}")
+    if not isinstance(config["history_file"], str):
+        raise Exception(f"Invalid history_file value: {config['history_file']}")
 
 def setup_logging(log_file, log_level):
     level_map = {
@@ -100,27 +214,34 @@ def get_permissions(path):
     except Exception as e:
         raise Exception(f"Failed to get permissions: {str(e)}")
     
+PERMISSION_BITS = {
+    'r': stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH,
+    'w': stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH,
+    'x': stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+}
+
+def compute_mode(current_mode, perms):
+    # Permission bits that perms (e.g. +x, -w, 755) produces from current_mode
+    if perms.startswith('+') or perms.startswith('-'):
+        # Symbolic mode (e.g., +x, -w)
+        mode = current_mode & 0o777
+        for p in perms[1:]:
+            if p not in PERMISSION_BITS:
+                raise ValueError(f"Invalid permission '{p}' in {perms}")
+            if perms[0] == '+':
+                mode |= PERMISSION_BITS[p]
+            else:
+                mode &= ~PERMISSION_BITS[p]
+        return mode
+    # Octal mode (e.g., 755)
+    return int(perms, 8)
+
 def set_permissions(path, perms):
     try:
-        current_mode = os.stat(path).st_mode
-        if perms.startswith('+') or perms.startswith('-'):
-            # Symbolic mode (e.g., +x, -w)
-            mode = current_mode
-            for p in perms[1:]:
-                if p == 'r':
-                    mode |= stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH if perms[0] == '+' else ~(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
-                elif p == 'w':
-                    mode |= stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH if perms[0] == '+' else ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
-                elif p == 'x':
-                    mode |= stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH if perms[0] == '+' else ~(stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
-            os.chmod(path, mode & 0o777)  # Mask to keep only permission bits
-        else:
-            # Octal mode (e.g., 755)
-            mode = int(perms, 8)
-            os.chmod(path, mode)
+        os.chmod(path, compute_mode(os.stat(path).st_mode, perms))
     except Exception as e:
         raise Exception(f"Failed to set permissions: {str(e)}")
-
+    
 def size_to_bytes(size):
     if size is None:
         return None
@@ -132,9 +253,6 @@ def size_to_bytes(size):
         return int(size[:-1]) * units[size[-1]]
     return int(size)
 
-def suggest_commands(input_cmd, available_commands):
-    return get_close_matches(input_cmd, available_commands, n=3, cutoff=0.6)
-
 def run_script(script_path, cli):
     if not os.path.exists(script_path):
         return f"Script file not found: {script_path}"
@@ -144,6 +262,7 @@ def run_script(script_path, cli):
                 line = line.strip()
                 if line and not line.startswith('#'):
                     cli.run_command(line.split())
+        cli.file_manager.flush_writes()
         return True
     except Exception as e:
         return f"Failed to run script: {str(e)}"
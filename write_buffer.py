@@ -0,0 +1,85 @@
+import os
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+
+class WriteBufferPool:
+    """Small LRU pool of open, heavily buffered append handles.
+
+    Appends to the same file between two flush() calls reuse one handle and
+    reach the disk in buffer_size blocks instead of an open/write/close per
+    line. flush() writes out and closes every handle, so nothing stays open
+    while other operations move or delete the files.
+
+    In atomic mode appends go to a temporary copy next to the file, which
+    flush() fsyncs and moves over the original with os.replace, so an
+    interrupted batch leaves the file as it was before the batch began.
+    """
+
+    def __init__(self, max_open=8, buffer_size=1024 * 1024, atomic=False):
+        self.max_open = max_open
+        self.buffer_size = buffer_size
+        self.atomic = atomic
+        self.handles = OrderedDict()  # path -> (file object, temp path or None)
+        self.lock = threading.RLock()
+
+    def _open(self, path):
+        if not self.atomic:
+            return open(path, 'ab', buffering=self.buffer_size), None
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+        if os.path.exists(path):
+            shutil.copy2(path, tmp_path)
+        f = open(tmp_path, 'ab', buffering=self.buffer_size)
+        return f, tmp_path
+
+    def append(self, path, data):
+        # Returns the path of a file written out to make room in the pool, if any
+        path = os.path.abspath(path)
+        evicted = None
+        with self.lock:
+            entry = self.handles.get(path)
+            if entry is None:
+                entry = self.handles[path] = self._open(path)
+                if len(self.handles) > self.max_open:
+                    evicted, old = self.handles.popitem(last=False)
+                    self._commit(evicted, old)
+            else:
+                self.handles.move_to_end(path)
+            entry[0].write(data.encode("utf-8"))
+        return evicted
+
+    def _commit(self, path, entry):
+        f, tmp_path = entry
+        try:
+            if tmp_path is None:
+                f.close()
+                return
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+            os.replace(tmp_path, path)
+        except Exception:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def flush(self, path=None):
+        # Returns the paths written out
+        flushed = []
+        with self.lock:
+            for p in [os.path.abspath(path)] if path else list(self.handles):
+                entry = self.handles.pop(p, None)
+                if entry is not None:
+                    self._commit(p, entry)
+                    flushed.append(p)
+        return flushed
+
+    def close(self):
+        with self.lock:
+            while self.handles:
+                path, entry = self.handles.popitem(last=False)
+                try:
+                    self._commit(path, entry)
+                except Exception as e:
+                    logging.error(f"Failed to flush {path}: {str(e)}")